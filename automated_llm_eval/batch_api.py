@@ -0,0 +1,313 @@
+"""Offline chat completions through the OpenAI Batch API.
+
+A list of requests is serialized into the batch JSONL input format (one
+`{"custom_id", "method", "url", "body"}` object per line), submitted, polled until the
+batch finishes, and the output JSONL is mapped back to the requests in input order.
+Batches trade latency (up to `completion_window`) for a lower price and a separate,
+much larger rate limit, which suits offline jobs such as judging whole experiment grids.
+
+`LocalBatchExecutor` is a stand-in that runs the same JSONL files locally against any
+OpenAI-compatible chat completions endpoint (e.g. `MockOpenAIServer`), for development
+and testing without the Batch API.
+
+Example Usage:
+```python
+model = ChatModel(model="gpt-4", temperature=0.1, seed=42)
+bundles = model.batch_chat_completions(messages_list, output_format="bundle")
+
+# Local development against the mock server
+with MockOpenAIServer() as server:
+    executor = LocalBatchExecutor(base_url=server.base_url)
+    bundles = model.batch_chat_completions(messages_list, executor=executor, poll_interval=0.1)
+```
+"""
+import itertools
+import json
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+# Batch states after which the batch no longer changes
+TERMINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchError(Exception):
+    "A batch failed validation, or did not finish in time."
+
+
+def build_batch_input(requests: list[dict[str, Any]]) -> tuple[list[str], str]:
+    """Serialize chat completion request bodies into the batch JSONL input format.
+    Returns the custom IDs, in the order of `requests`, and the JSONL text."""
+    custom_ids = [f"request-{i}" for i in range(len(requests))]
+    lines = [
+        json.dumps(
+            {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": CHAT_COMPLETIONS_ENDPOINT,
+                "body": body,
+            }
+        )
+        for custom_id, body in zip(custom_ids, requests)
+    ]
+    return custom_ids, "\n".join(lines) + "\n"
+
+
+def parse_batch_output(text: str) -> dict[str, dict[str, Any] | None]:
+    """Parse batch output (or error) JSONL into `{custom_id: response body}`.
+    The body is the ChatCompletion JSON, or `None` if the request failed."""
+    results = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        body = None
+        if record.get("error") is None and response.get("status_code") == 200:
+            body = response.get("body")
+        results[record["custom_id"]] = body
+    return results
+
+
+class BatchExecutor:
+    "Submits batch input files, reports their status and serves their output files."
+
+    def submit(self, input_path: str | Path) -> str:
+        "Submit the JSONL file at `input_path` and return the batch ID."
+        raise NotImplementedError
+
+    def retrieve(self, batch_id: str) -> dict[str, Any]:
+        """Get the batch object: `id`, `status`, `output_file_id`, `error_file_id`,
+        `request_counts` and `errors`, as returned by the Batch API."""
+        raise NotImplementedError
+
+    def download(self, file_id: str) -> str:
+        "Get the content of an output or error file."
+        raise NotImplementedError
+
+    def cancel(self, batch_id: str) -> None:
+        pass
+
+    def run(
+        self,
+        requests: list[dict[str, Any]],
+        poll_interval: float = 30.0,
+        timeout: float | None = None,
+        directory: str | Path | None = None,
+    ) -> list[dict[str, Any] | None]:
+        """Run chat completion request bodies as one batch, blocking until it finishes.
+
+        Returns the ChatCompletion JSON of every request in the order of `requests`
+        (`None` for failed requests).  Raises `BatchError` if the batch fails validation,
+        or cancels it and raises if it has not finished after `timeout` seconds.
+        """
+        custom_ids, text = build_batch_input(requests)
+        with tempfile.TemporaryDirectory() as tmp_directory:
+            input_path = Path(directory or tmp_directory) / f"batch_input_{uuid.uuid4().hex}.jsonl"
+            input_path.parent.mkdir(parents=True, exist_ok=True)
+            input_path.write_text(text, encoding="utf-8")
+            batch_id = self.submit(input_path)
+
+        start_time = time.monotonic()
+        batch = self.retrieve(batch_id)
+        while batch["status"] not in TERMINAL_STATES:
+            if timeout is not None and time.monotonic() - start_time > timeout:
+                self.cancel(batch_id)
+                raise BatchError(f"Batch {batch_id} did not finish within {timeout} seconds.")
+            time.sleep(poll_interval)
+            batch = self.retrieve(batch_id)
+        if batch["status"] == "failed":
+            raise BatchError(f"Batch {batch_id} failed: {batch.get('errors')}")
+
+        # Expired and cancelled batches still return the requests that completed
+        results = {}
+        for file_id in (batch.get("output_file_id"), batch.get("error_file_id")):
+            if file_id:
+                results |= parse_batch_output(self.download(file_id))
+        return [results.get(custom_id) for custom_id in custom_ids]
+
+
+class OpenAIBatchExecutor(BatchExecutor):
+    """Executor backed by the OpenAI Batch API (`/files` and `/batches` endpoints).
+
+    Requests use the shared keep-alive session of `create_chat_completion`.  If `api_key`
+    is `None`, it is resolved with `get_openai_api_key`.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        base_url: str | None = None,
+        completion_window: str = "24h",
+        timeout: float = 60.0,
+    ) -> None:
+        if api_key is None:
+            from automated_llm_eval.config import get_openai_api_key
+
+            api_key = get_openai_api_key()
+        self.api_key = api_key
+        self.base_url = (base_url or "https://api.openai.com/v1").rstrip("/")
+        self.completion_window = completion_window
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, **kwargs):
+        from automated_llm_eval.create_chat_completion import get_session
+
+        response = get_session().request(
+            method,
+            f"{self.base_url}{path}",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            timeout=self.timeout,
+            **kwargs,
+        )
+        response.raise_for_status()
+        return response
+
+    def submit(self, input_path: str | Path) -> str:
+        with open(input_path, "rb") as file:
+            uploaded = self._request(
+                "POST", "/files", data={"purpose": "batch"}, files={"file": file}
+            ).json()
+        batch = self._request(
+            "POST",
+            "/batches",
+            json={
+                "input_file_id": uploaded["id"],
+                "endpoint": CHAT_COMPLETIONS_ENDPOINT,
+                "completion_window": self.completion_window,
+            },
+        ).json()
+        return batch["id"]
+
+    def retrieve(self, batch_id: str) -> dict[str, Any]:
+        return self._request("GET", f"/batches/{batch_id}").json()
+
+    def download(self, file_id: str) -> str:
+        return self._request("GET", f"/files/{file_id}/content").text
+
+    def cancel(self, batch_id: str) -> None:
+        self._request("POST", f"/batches/{batch_id}/cancel")
+
+
+class LocalBatchExecutor(BatchExecutor):
+    """Stand-in for the Batch API that processes batch files locally.
+
+    Each submitted batch runs on a background thread that sends its requests, at most
+    `num_concurrent` at a time, to the chat completions endpoint at `base_url` (e.g. a
+    `MockOpenAIServer`), and writes output and error JSONL files in the Batch API format
+    to `directory`.  Batch objects go through the same states as in the Batch API.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str = "mock",
+        directory: str | Path | None = None,
+        num_concurrent: int = 8,
+        timeout: float = 60.0,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix="local_batches_")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.num_concurrent = num_concurrent
+        self.timeout = timeout
+        self._batches: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+
+    def _update(self, batch_id: str, **fields: Any) -> None:
+        with self._lock:
+            self._batches[batch_id].update(fields)
+
+    def _execute(self, line: str) -> tuple[bool, dict[str, Any]]:
+        "Send one request of a batch file; returns whether it succeeded and its output record."
+        from automated_llm_eval.create_chat_completion import get_session
+
+        request = json.loads(line)
+        record = {"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": request["custom_id"]}
+        try:
+            response = get_session().post(
+                f"{self.base_url}/chat/completions",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json=request["body"],
+                timeout=self.timeout,
+            )
+            record["response"] = {
+                "status_code": response.status_code,
+                "request_id": response.headers.get("x-request-id", ""),
+                "body": response.json(),
+            }
+            record["error"] = None
+            return response.status_code == 200, record
+        except Exception as e:
+            record["response"] = None
+            record["error"] = {"code": type(e).__name__, "message": str(e)}
+            return False, record
+
+    def _process(self, batch_id: str, lines: list[str]) -> None:
+        self._update(batch_id, status="in_progress", in_progress_at=int(time.time()))
+        with ThreadPoolExecutor(max_workers=self.num_concurrent) as executor:
+            outcomes = list(executor.map(self._execute, lines))
+        succeeded = [record for ok, record in outcomes if ok]
+        failed = [record for ok, record in outcomes if not ok]
+        self._update(batch_id, status="finalizing")
+        fields = {"output_file_id": None, "error_file_id": None}
+        for kind, records in (("output", succeeded), ("error", failed)):
+            if records:
+                file_id = f"{batch_id}_{kind}"
+                text = "".join(json.dumps(record) + "\n" for record in records)
+                (self.directory / f"{file_id}.jsonl").write_text(text, encoding="utf-8")
+                fields[f"{kind}_file_id"] = file_id
+        self._update(
+            batch_id,
+            status="completed",
+            completed_at=int(time.time()),
+            request_counts={
+                "total": len(lines),
+                "completed": len(succeeded),
+                "failed": len(failed),
+            },
+            **fields,
+        )
+
+    def submit(self, input_path: str | Path) -> str:
+        text = Path(input_path).read_text(encoding="utf-8")
+        lines = [line for line in text.splitlines() if line]
+        batch_id = f"batch_local_{next(self._counter)}_{uuid.uuid4().hex[:8]}"
+        errors = None
+        for line in lines:
+            request = json.loads(line)
+            if request.get("url") != CHAT_COMPLETIONS_ENDPOINT or "custom_id" not in request:
+                errors = {"data": [{"code": "invalid_request", "line": line[:200]}]}
+        with self._lock:
+            self._batches[batch_id] = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": CHAT_COMPLETIONS_ENDPOINT,
+                "status": "failed" if errors else "validating",
+                "errors": errors,
+                "created_at": int(time.time()),
+                "output_file_id": None,
+                "error_file_id": None,
+                "request_counts": {"total": len(lines), "completed": 0, "failed": 0},
+            }
+        if errors is None:
+            threading.Thread(
+                target=self._process, args=(batch_id, lines), name=batch_id, daemon=True
+            ).start()
+        return batch_id
+
+    def retrieve(self, batch_id: str) -> dict[str, Any]:
+        with self._lock:
+            return dict(self._batches[batch_id])
+
+    def download(self, file_id: str) -> str:
+        return (self.directory / f"{file_id}.jsonl").read_text(encoding="utf-8")
@@ -8,59 +8,122 @@ from automated_llm_eval.prompts import (
     prompt_improvement_character_prompt,
     score_retrieval_character_prompt,
 )
+from automated_llm_eval.score_extraction import COMPARE_SCORE_RANGE, ScoreExtractor
+from automated_llm_eval.utils import sidethread_event_loop_async_runner
 class BundleAccuracy:
-    def __init__(self, data):
+    def __init__(self, data, score_extractor=None):
         """
-        Initialize the AccuracyCalculator with a dictionary containing predicted and actual values.
-        The dictionary should have keys 'predicted' and 'actual'.
+        Initialize the AccuracyCalculator with the evaluated examples returned by
+        `generate_for_dataset`: dicts with the 'human_label', 'agent_label' and
+        'agent_response' of each example, plus the 'statement' (and for the compare task,
+        the 'human_response' and 'llm_response' being compared).
+        Examples without an 'agent_label' are scored from their 'agent_response' with
+        `score_extractor` (default: the compare-task `score_extractor`).
         """
         self.data = data
+        self.score_extractor = score_extractor
+
+    def agent_labels(self):
+        """
+        Agent label of every example.  Labels missing from the data are extracted in one
+        batch: the parsers run first, and the responses they cannot resolve are sent to the
+        LLM concurrently on a shared model.
+        """
+        labels = [metadata.get("agent_label") for metadata in self.data]
+        pending = [i for i, metadata in enumerate(self.data) if "agent_label" not in metadata]
+        if pending:
+            extractor = self.score_extractor or score_extractor
+            texts = [self.data[i].get("agent_response") for i in pending]
+            for i, label in zip(pending, extractor.extract_many(texts)):
+                labels[i] = label
+        return labels
 
     def accuracy(self):
         """
         Compute accuracy.
+        Returns the accuracy, the incorrect and correct COT statements, and the confusion
+        counts as `{human_label: {agent_label: count}}` (agent label `None` if unresolved).
         """
         correct=0
         incorrect_COT = []
         correct_COT = []
-        for bundle in self.data:
-            metadata= bundle.metadata
-            human_score =metadata['human_score']
-            agent_score = get_score(metadata['agent_response_score'])
-            if not agent_score:
-                pass
-            if int(human_score)==agent_score:
+        confusion = {}
+        for metadata, agent_score in zip(self.data, self.agent_labels()):
+            human_score = metadata['human_label']
+            if human_score is None or human_score != human_score:  # no human label (or NaN)
+                continue
+            human_score = int(human_score)
+            counts = confusion.setdefault(human_score, {})
+            counts[agent_score] = counts.get(agent_score, 0) + 1
+            if human_score==agent_score:
                 correct+=1
                 correct_COT.append(metadata['statement'])
-            else:
+            elif "human_response" in metadata:
                 statement_analysis = (
                     "The following statement: "
                     + metadata["statement"]
                     + " was summarized in the following two ways. Summary A: "
                     + metadata["human_response"]
                     + "and summary B:"
-                    + metadata["agent_response"]
+                    + metadata["llm_response"]
                     + " The summaries were compared and scored incorrectly by the agent, and the correct score should have been: "
-                    + str(metadata["human_score"])
+                    + str(human_score)
                     + ". The agent's incorrect reasoning for this score is as follows: "
-                    + metadata["agent_response_score"]
+                    + str(metadata["agent_response"])
+                )
+                incorrect_COT.append(statement_analysis)
+            else:
+                statement_analysis = (
+                    "The following statement: "
+                    + metadata["statement"]
+                    + " was given a score of: "
+                    + str(agent_score)
+                    + " by the agent, but the correct score should have been: "
+                    + str(human_score)
+                    + ". The agent's reasoning for this score is as follows: "
+                    + str(metadata["agent_response"])
                 )
                 incorrect_COT.append(statement_analysis)
-        return correct/(len(incorrect_COT)+correct) or 0, incorrect_COT, correct_COT
+        total = len(incorrect_COT) + correct
+        return correct / total if total else 0, incorrect_COT, correct_COT, confusion
 
-def get_score(agent_response: str):
-    SCORE_RETRIEVAL = SCORE_RETRIEVAL_PROMPT.format(response=agent_response)
-    model_score = ChatModel(
-            model="gpt-3.5-turbo-1106", temperature=0.1, top_p=0.5, max_tokens=700, seed=42
-        )
-    response_score_string = model_score.create_chat_completion(
-            score_retrieval_character_prompt, SCORE_RETRIEVAL, output_format="simple"
+# Shared by every score retrieval call, so the OpenAI client and its connections are reused
+score_retrieval_model = ChatModel(
+    model="gpt-3.5-turbo-1106", temperature=0.1, top_p=0.5, max_tokens=700, seed=42
+)
+
+def score_retrieval_message(agent_response: str):
+    return [
+        {"role": "system", "content": score_retrieval_character_prompt},
+        {"role": "user", "content": SCORE_RETRIEVAL_PROMPT.format(response=agent_response)},
+    ]
+
+def llm_score_retrieval(agent_response: str):
+    "Ask the LLM to return the score stated in `agent_response`."
+    return score_retrieval_model.chat_completion(
+        score_retrieval_message(agent_response), output_format="simple"
+    )
+
+def llm_batch_score_retrieval(agent_responses: list[str], num_concurrent: int = 8):
+    "Ask the LLM for the scores stated in `agent_responses`, `num_concurrent` at a time."
+    return sidethread_event_loop_async_runner(
+        score_retrieval_model.async_chat_completions(
+            [score_retrieval_message(agent_response) for agent_response in agent_responses],
+            num_concurrent=num_concurrent,
+            output_format="simple",
         )
-    try:
-        response_int = int(response_score_string)
-        return response_int
-    except:
-        return None
+    )
+
+# Compare-task scores are parsed directly from the response; the LLM is only asked
+# for responses that the parsers could not resolve
+score_extractor = ScoreExtractor(
+    COMPARE_SCORE_RANGE,
+    llm_fallback=llm_score_retrieval,
+    batch_llm_fallback=llm_batch_score_retrieval,
+)
+
+def get_score(agent_response: str, extractor: ScoreExtractor = score_extractor):
+    return extractor.extract(agent_response)
 
 # for example in results
 #         print("WE ARE ON THE ", k, "th example")
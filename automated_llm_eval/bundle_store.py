@@ -0,0 +1,272 @@
+"""Columnar storage of `Bundle`s as Arrow tables in Parquet files.
+
+Bundles are stored with typed columns (token counts, seed, temperature, ...), message
+metadata as a nested struct column, and repeated strings (system messages, model names,
+low-cardinality metadata fields such as policies) dictionary-encoded, so experiment
+outputs are a fraction of the size of the equivalent CSV and load without re-parsing text.
+
+Example Usage:
+```python
+with BundleStore("results/bundles/gpt-4_judge") as store:
+    store.extend(bundles)
+
+table = BundleStore("results/bundles/gpt-4_judge").read_table(["model", "total_tokens"])
+df = BundleStore("results/bundles/gpt-4_judge").to_pandas()
+```
+"""
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable
+
+from automated_llm_eval.chat_model import Bundle
+from automated_llm_eval.result_sink import ResultSink, to_jsonable
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+# Bundle field -> Arrow type name (see `bundle_schema`)
+BUNDLE_FIELD_TYPES = {
+    "id": "string",
+    "system_message": "dictionary",
+    "user_message": "string",
+    "response_message": "string",
+    "created_time": "int64",
+    "model": "dictionary",
+    "total_tokens": "int32",
+    "prompt_tokens": "int32",
+    "completion_tokens": "int32",
+    "seed": "int64",
+    "temperature": "float64",
+    "top_p": "float64",
+    "max_tokens": "int32",
+}
+# String metadata fields with at most this fraction of distinct values are dictionary-encoded
+DICTIONARY_MAX_DISTINCT_RATIO = 0.5
+
+
+def bundle_schema(metadata_type: "pa.DataType | None" = None) -> "pa.Schema":
+    "Arrow schema of a Bundle table, with a `key` column and the given metadata struct type."
+    import pyarrow as pa
+
+    types = {
+        "string": pa.string(),
+        "dictionary": pa.dictionary(pa.int32(), pa.string()),
+        "int32": pa.int32(),
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+    }
+    fields = [pa.field("key", pa.string())]
+    for name in Bundle._fields:
+        if name == "metadata":
+            fields += [pa.field("metadata", metadata_type or pa.null())]
+        else:
+            fields += [pa.field(name, types[BUNDLE_FIELD_TYPES[name]])]
+    return pa.schema(fields)
+
+
+def _dictionary_encode_metadata(array: "pa.Array") -> "pa.Array":
+    "Dictionary-encode the low-cardinality string fields of the metadata struct."
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if not pa.types.is_struct(array.type) or len(array) == 0:
+        return array
+    children, fields = [], []
+    for i, field in enumerate(array.type):
+        child = array.field(i)
+        if pa.types.is_string(field.type):
+            num_distinct = len(pc.unique(child))
+            if num_distinct <= max(1, DICTIONARY_MAX_DISTINCT_RATIO * len(child)):
+                child = pc.dictionary_encode(child)
+        children += [child]
+        fields += [pa.field(field.name, child.type)]
+    return pa.StructArray.from_arrays(children, fields=fields, mask=array.is_null())
+
+
+def bundles_to_table(bundles: Iterable[Bundle | dict], keys: Iterable[Any] | None = None):
+    """Convert Bundles (or `bundle_dict` dicts) to an Arrow table with the Bundle schema.
+
+    Metadata dicts become a struct column.  If their fields have inconsistent types across
+    rows, the metadata is stored as JSON text instead.
+    """
+    import pyarrow as pa
+
+    rows = [b._asdict() if isinstance(b, Bundle) else dict(b) for b in bundles]
+    keys = [str(i) for i in range(len(rows))] if keys is None else [str(k) for k in keys]
+    columns = {"key": pa.array(keys, pa.string())}
+    schema = bundle_schema()
+    for name in Bundle._fields:
+        values = [row.get(name) for row in rows]
+        if name == "metadata":
+            values = [to_jsonable(value) or None for value in values]
+            if all(value is None for value in values):
+                columns[name] = pa.nulls(len(rows))
+                continue
+            try:
+                columns[name] = _dictionary_encode_metadata(pa.array(values))
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                columns[name] = pa.array(
+                    [None if v is None else json.dumps(v, default=str) for v in values],
+                    pa.string(),
+                )
+        else:
+            columns[name] = pa.array(values, schema.field(name).type)
+    return pa.table(columns)
+
+
+def _unify_metadata(tables: list["pa.Table"]) -> list["pa.Table"]:
+    """Give the metadata column of every table the same type, so that parts written with
+    different metadata fields can be concatenated.  Missing fields become nulls; fields
+    whose types cannot be reconciled fall back to JSON text metadata."""
+    import pyarrow as pa
+
+    types = [t.schema.field("metadata").type for t in tables if "metadata" in t.column_names]
+    if len(set(types)) <= 1:
+        return tables
+    field_types: dict[str, list] = {}
+    for type_ in types:
+        if pa.types.is_struct(type_):
+            for field in type_:
+                field_types.setdefault(field.name, []).append(field.type)
+    as_json = any(pa.types.is_string(type_) for type_ in types)
+    fields = []
+    for name, candidates in field_types.items():
+        candidates = set(candidates) - {pa.null()}
+        values = {t.value_type if pa.types.is_dictionary(t) else t for t in candidates}
+        if not candidates:
+            fields += [pa.field(name, pa.null())]
+        elif len(candidates) == 1:
+            fields += [pa.field(name, candidates.pop())]
+        elif values == {pa.string()}:
+            fields += [pa.field(name, pa.dictionary(pa.int32(), pa.string()))]
+        elif all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in values):
+            fields += [pa.field(name, pa.float64())]
+        else:
+            as_json = True
+    unified = []
+    for table in tables:
+        metadata = table.column("metadata")
+        if as_json:
+            values = [
+                v if v is None or isinstance(v, str) else json.dumps(v, default=str)
+                for v in metadata.to_pylist()
+            ]
+            array = pa.array(values, pa.string())
+        else:
+            array = pa.array(metadata.to_pylist(), pa.struct(fields))
+        index = table.column_names.index("metadata")
+        unified += [table.set_column(index, "metadata", array)]
+    return unified
+
+
+class BundleStore(ResultSink):
+    """Append-only columnar store of Bundles: a directory of Parquet files, one per row group.
+
+    Bundles are buffered and written as a new `part-XXXXX.parquet` row group every
+    `row_group_size` rows, each written to a temporary file and atomically renamed so a
+    crash never leaves a truncated part behind.  Reads are memory-mapped, and can load
+    only the needed columns.
+
+    As a `ResultSink`, it can be passed as `sink` to `ChatModel.async_chat_completions`
+    with `output_format="bundle"` to persist results as they complete.  Requires `pyarrow`
+    (the `parquet` extra).
+    """
+
+    def __init__(self, path: str | Path, resume: bool = True, row_group_size: int = 1000) -> None:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError(
+                "BundleStore requires `pyarrow`; install it with the `parquet` extra, "
+                "e.g. `pip install automated-llm-eval[parquet]`."
+            ) from e
+        self.path = Path(path)
+        self.row_group_size = row_group_size
+        self.path.mkdir(parents=True, exist_ok=True)
+        if not resume:
+            for part in self.path.glob("part-*.parquet"):
+                part.unlink()
+        self._keys: list[str] = []
+        self._buffer: list[Bundle | dict] = []
+        self._num_parts = len(list(self.path.glob("part-*.parquet")))
+        self._num_rows = None
+
+    def append(self, bundle: Bundle | dict, key: Any = None) -> None:
+        "Add a Bundle (or `bundle_dict`) with an optional unique `key` (default: row number)."
+        if key is None:
+            key = len(self)
+        self._keys += [str(key)]
+        self._buffer += [bundle]
+        if self._num_rows is not None:
+            self._num_rows += 1
+        if len(self._buffer) >= self.row_group_size:
+            self.flush()
+
+    def extend(self, bundles: Iterable[Bundle | dict]) -> None:
+        for bundle in bundles:
+            self.append(bundle)
+
+    def write(self, key: Any, value: Any) -> None:
+        # Failed requests (`None`) are not stored, so that resumed runs retry them
+        if value is not None:
+            self.append(value, key=key)
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        import pyarrow.parquet as pq
+
+        table = bundles_to_table(self._buffer, self._keys)
+        part_path = self.path / f"part-{self._num_parts:05d}.parquet"
+        tmp_path = part_path.with_suffix(".tmp")
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, part_path)
+        self._num_parts += 1
+        self._keys, self._buffer = [], []
+
+    def __len__(self) -> int:
+        if self._num_rows is None:
+            import pyarrow.parquet as pq
+
+            self._num_rows = len(self._buffer) + sum(
+                pq.ParquetFile(part).metadata.num_rows
+                for part in sorted(self.path.glob("part-*.parquet"))
+            )
+        return self._num_rows
+
+    def read_table(self, columns: list[str] | None = None, memory_map: bool = True) -> "pa.Table":
+        """Read the stored Bundles as one Arrow table (only `columns`, if given).
+        Parts with different metadata fields are combined, with missing fields as nulls."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.flush()
+        parts = sorted(self.path.glob("part-*.parquet"))
+        if not parts:
+            return bundle_schema().empty_table()
+        tables = [pq.read_table(part, columns=columns, memory_map=memory_map) for part in parts]
+        return pa.concat_tables(_unify_metadata(tables), promote_options="permissive")
+
+    def to_pandas(self, columns: list[str] | None = None) -> "pd.DataFrame":
+        "Read the stored Bundles as a DataFrame; metadata struct fields become columns."
+        return self.read_table(columns).flatten().to_pandas()
+
+    def read_bundles(self) -> list[Bundle]:
+        "Read the stored Bundles back as `Bundle` namedtuples, in write order."
+        return [Bundle(**value) for value in self.read().values()]
+
+    def read(self) -> dict[str, Any]:
+        "Get all stored Bundles as `{key: bundle_dict}` in write order."
+        results = {}
+        for row in self.read_table().to_pylist():
+            key = row.pop("key")
+            if isinstance(row["metadata"], str):
+                row["metadata"] = json.loads(row["metadata"])
+            results[key] = row
+        return results
+
+    def completed_keys(self) -> set[str]:
+        self.flush()
+        return set(self.read_table(["key"]).column("key").to_pylist())
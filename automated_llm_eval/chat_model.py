@@ -1,15 +1,45 @@
+from __future__ import annotations
+
 import asyncio
+import contextlib
 import logging
+import threading
+import time
 import warnings
-from dataclasses import dataclass
-from typing import Any, Callable, NamedTuple
-
-import httpx
-import openai
-from openai.types.chat.chat_completion import ChatCompletion
-
-import private_key as private_key
-from automated_llm_eval.utils import ProgressBar
+import weakref
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    NamedTuple,
+    Union,
+)
+
+from automated_llm_eval.config import get_openai_api_key
+from automated_llm_eval.result_sink import ResultSink
+from automated_llm_eval.utils import (
+    AdaptiveConcurrencyLimiter,
+    ProgressBar,
+    ResponseCache,
+    RetryPolicy,
+    RetryState,
+    TokenUsage,
+    configure_rate_limit,
+    estimate_num_tokens,
+    get_rate_limiter,
+    on_loop_shutdown,
+    request_key,
+)
+
+if TYPE_CHECKING:
+    import openai
+    from openai.types.chat.chat_completion import ChatCompletion
+
+    from automated_llm_eval.batch_api import BatchExecutor
 
 chat_logger = logging.getLogger(name="ChatLogger")
 
@@ -46,7 +76,61 @@ class Bundle(NamedTuple):
 
 # Type Aliases
 MessagesType = list[dict[str, str]] | Message
-ChatCompletionResponseType = ChatCompletion | str | Bundle | dict[str, Any] | None
+ChatCompletionResponseType = Union["ChatCompletion", str, Bundle, dict[str, Any], None]
+
+# Seconds allowed per API call.  The read timeout must cover generating the whole completion.
+DEFAULT_REQUEST_TIMEOUT = 60.0
+# Connect timeout is short so an unreachable endpoint fails fast
+CONNECT_TIMEOUT = 10.0
+
+# OpenAI clients shared by all ChatModel instances with the same API key, base URL and timeout.
+# Async clients hold connections bound to an event loop, so they are shared per loop.
+_clients: dict[tuple[str, str | None, bool, float], openai.OpenAI] = {}
+_async_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[tuple[str, str | None, bool, float], openai.AsyncOpenAI]
+] = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def get_openai_client(
+    api_key: str | None = None,
+    base_url: str | None = None,
+    is_async: bool = False,
+    timeout: float = DEFAULT_REQUEST_TIMEOUT,
+) -> openai.OpenAI | openai.AsyncOpenAI:
+    """Get a shared OpenAI client, constructing it on first use.
+
+    `openai` is imported here rather than at module import so that importing this
+    module stays cheap.  If `api_key` is `None`, it is resolved with `get_openai_api_key`.
+    Async clients are shared only within the event loop they are first used on.
+    `timeout` is the number of seconds allowed for each request, including reading
+    the whole completion.
+    """
+    api_key = api_key or get_openai_api_key()
+    key = (api_key, base_url, is_async, timeout)
+    with _clients_lock:
+        if is_async:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            clients = _async_clients.setdefault(loop, {}) if loop is not None else {}
+        else:
+            clients = _clients
+        if key not in clients:
+            import httpx
+            import openai
+
+            client_class = openai.AsyncOpenAI if is_async else openai.OpenAI
+            clients[key] = client_class(
+                api_key=api_key,
+                base_url=base_url,
+                max_retries=0,
+                timeout=httpx.Timeout(timeout, connect=min(CONNECT_TIMEOUT, timeout)),
+            )
+            if is_async and loop is not None:
+                on_loop_shutdown(clients[key].close)
+        return clients[key]
 
 
 # Example Function Signature for validation callback function
@@ -61,20 +145,51 @@ def validation_callback(
 
 @dataclass(kw_only=True)
 class ChatModel:
-    """Wrapper around openai.ChatCompletion with concurrency limiting
-    and exponential backoff retries."""
-
-    # OpenAI API Config
-    sync_client: openai.OpenAI = openai.OpenAI(
-        api_key=private_key.key["open-ai"],
-        max_retries=10,
-        timeout=httpx.Timeout(60.0, read=5.0, write=10.0, connect=10.0),
-    )
-    async_client: openai.AsyncOpenAI = openai.AsyncOpenAI(
-        api_key=private_key.key["open-ai"],
-        max_retries=10,
-        timeout=httpx.Timeout(60.0, read=5.0, write=10.0, connect=10.0),
-    )
+    """Wrapper around openai.ChatCompletion with concurrency limiting, rate limiting
+    and exponential backoff retries.
+
+    Failed API calls are retried by a single engine shared by the sync and async paths
+    (see `retry_policy`): full-jitter exponential backoff that honors `Retry-After`,
+    gives up immediately on non-retryable errors (e.g. 400, content filter), and
+    enforces a per-request deadline (and a shared `RetryBudget`, if one is set on the
+    policy).  The OpenAI clients are configured with `max_retries=0` so retries are not
+    stacked.
+
+    OpenAI clients are built lazily on first use from `api_key` (or the `OPENAI_API_KEY`
+    environment variable, or `private_key.py`) and `base_url`, and are shared across
+    ChatModel instances with the same configuration.
+
+    Setting `requests_per_minute` and/or `tokens_per_minute` configures a token-bucket
+    rate limiter for `model`.  The limiter is shared by every ChatModel instance that
+    targets the same model, and every API call waits on it before dispatch.
+
+    Setting `adaptive_concurrency=True` replaces the fixed `num_concurrent` semaphore in
+    `async_chat_completions` with an AIMD window that grows while requests are healthy
+    and shrinks on 429s, timeouts and latency spikes.  The current window and its history
+    are available at `concurrency_limiter.limit` and `concurrency_limiter.history`.
+
+    Setting `cache` to a `ResponseCache` makes `chat_completion` and `async_chat_completion`
+    return previously recorded responses for identical requests instead of calling the API.
+    This is intended for deterministic settings (fixed `seed`, low `temperature`).
+
+    When sampling is deterministic (`seed` set and `temperature` at most
+    `coalesce_max_temperature`), identical requests issued concurrently through the async
+    client are coalesced: one API call is made and its ChatCompletion is shared with
+    every waiter.  Each waiter still parses and validates the response independently.
+
+    Setting `usage` to a `TokenUsage` accumulates the number of API calls made and their
+    token usage (cache hits and coalesced waiters are not counted).
+    """
+
+    # OpenAI API Config (clients are constructed on first use if not provided)
+    api_key: str | None = field(default=None, repr=False)
+    base_url: str | None = None
+    sync_client: openai.OpenAI | None = field(default=None, repr=False)
+    async_client: openai.AsyncOpenAI | None = field(default=None, repr=False)
+    # Seconds allowed per API call (including reading the whole completion)
+    request_timeout: float = DEFAULT_REQUEST_TIMEOUT
+    # Retry Config
+    retry_policy: RetryPolicy = field(default_factory=RetryPolicy, repr=False)
     # Model Config
     model: str = "gpt-3.5-turbo"
     temperature: float = 0.9
@@ -82,6 +197,45 @@ class ChatModel:
     max_tokens: int = None
     n: int = 1
     seed: int | None = None
+    # Rate Limit Config (shared across all ChatModel instances for the same model)
+    requests_per_minute: int | None = None
+    tokens_per_minute: int | None = None
+    # Adaptive Concurrency Config
+    adaptive_concurrency: bool = False
+    concurrency_limiter: AdaptiveConcurrencyLimiter | None = field(default=None, repr=False)
+    # Persistent Response Cache Config
+    cache: ResponseCache | None = field(default=None, repr=False)
+    # In-flight Request Coalescing Config
+    coalesce_duplicates: bool = True
+    coalesce_max_temperature: float = 0.2
+    _inflight: dict[str, asyncio.Future] = field(default_factory=dict, init=False, repr=False)
+    # Usage Accounting Config (requests and tokens of every API call made)
+    usage: TokenUsage | None = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.adaptive_concurrency and self.concurrency_limiter is None:
+            self.concurrency_limiter = AdaptiveConcurrencyLimiter()
+        if self.requests_per_minute is not None or self.tokens_per_minute is not None:
+            configure_rate_limit(
+                self.model,
+                requests_per_minute=self.requests_per_minute,
+                tokens_per_minute=self.tokens_per_minute,
+            )
+
+    def get_sync_client(self) -> openai.OpenAI:
+        if self.sync_client is None:
+            self.sync_client = get_openai_client(
+                self.api_key, self.base_url, is_async=False, timeout=self.request_timeout
+            )
+        return self.sync_client
+
+    def get_async_client(self) -> openai.AsyncOpenAI:
+        # Not stored on the instance: the shared client depends on the running event loop
+        if self.async_client is None:
+            return get_openai_client(
+                self.api_key, self.base_url, is_async=True, timeout=self.request_timeout
+            )
+        return self.async_client
 
     def create_chat_completion(
         self, system_message: str, user_message: str, **kwargs
@@ -178,6 +332,35 @@ class ChatModel:
             case _:
                 return cc
 
+    def _read_cache(
+        self,
+        updated_kwargs: dict[str, Any],
+        output_format: str | None,
+        validation_callback: Callable,
+    ) -> ChatCompletionResponseType:
+        "Return cached response for request if it exists and passes validation."
+        api_kwargs = updated_kwargs.copy()
+        messages = api_kwargs.pop("messages")
+        msgs = messages.messages if isinstance(messages, Message) else messages
+        cached = self.cache.get(request_key(msgs, api_kwargs))
+        if cached is None:
+            return None
+        from openai.types.chat.chat_completion import ChatCompletion
+
+        cc = ChatCompletion.model_validate_json(cached)
+        response = self.parse_chat_completion_response(
+            cc=cc, output_format=output_format, messages=messages, **api_kwargs
+        )
+        if validation_callback(messages, response):
+            return response
+        return None
+
+    def _write_cache(self, updated_kwargs: dict[str, Any], cc: ChatCompletion) -> None:
+        api_kwargs = updated_kwargs.copy()
+        messages = api_kwargs.pop("messages")
+        msgs = messages.messages if isinstance(messages, Message) else messages
+        self.cache.put(request_key(msgs, api_kwargs), cc.model_dump_json())
+
     def chat_completion(
         self,
         messages: MessagesType,
@@ -205,8 +388,9 @@ class ChatModel:
                 ```
             output_format (str | None, optional): Controls format of output.
                 see method `parse_chat_completion_response`.
-            num_retries (int): Number of retries if API call fails.  If still fails,
-                then `None` is returned.
+            num_retries (int): Number of retries if API call fails or the response is
+                rejected by `validation_callback`.  Retries follow `retry_policy`.
+                If still fails, then `None` is returned.
             validation_callback (Callable | None, optional): A function that accepts
                 the input `messages`, and `response` (the result of formatting the raw
                 ChatCompletion to the selected `output_format`) and returns `True` or `False`.
@@ -231,39 +415,56 @@ class ChatModel:
         }
         updated_kwargs = default_kwargs | kwargs
 
-        def attempt_retry(num_retries: int) -> ChatCompletionResponseType:
-            if num_retries > 0:
-                # Decrement retry counter, recursively call this method
-                return self.chat_completion(
-                    **updated_kwargs, output_format=output_format, num_retries=num_retries
-                )
-            else:
+        # Return cached response for identical request without calling API
+        if self.cache is not None:
+            cached_response = self._read_cache(updated_kwargs, output_format, validation_callback)
+            if cached_response is not None:
+                return cached_response
+            if self.cache.read_only:
+                warnings.warn(f"Response cache miss in read-only replay mode: {updated_kwargs}")
                 return None
 
-        try:
-            # Format kwargs for API call
-            api_kwargs = updated_kwargs.copy()
-            msgs = api_kwargs.pop("messages")
-            if isinstance(msgs, Message):
-                msgs = msgs.messages
-            cc = self.sync_client.chat.completions.create(messages=msgs, **api_kwargs)
-            # Format API call response
-            response = self.parse_chat_completion_response(
-                cc=cc, output_format=output_format, messages=messages, **api_kwargs
-            )
-            # Validation Callback
-            did_pass_validation = validation_callback(messages, response)
-            if did_pass_validation:
-                return response
-            else:
-                return attempt_retry(num_retries=num_retries - 1)
-        except Exception as e:
-            warnings.warn(
-                f"Failed to create ChatCompletion with arguments: {updated_kwargs.items()}\n"
-                f"Exception: {e}\n"
-                f"Retries left: {num_retries}"
-            )
-            return attempt_retry(num_retries=num_retries - 1)
+        # Format kwargs for API call
+        api_kwargs = updated_kwargs.copy()
+        msgs = api_kwargs.pop("messages")
+        if isinstance(msgs, Message):
+            msgs = msgs.messages
+
+        retry_state = RetryState(self.retry_policy, max_retries=num_retries)
+        while True:
+            try:
+                # Wait for rate limit quota before dispatch
+                limiter = get_rate_limiter(api_kwargs["model"])
+                if limiter is not None:
+                    estimated_tokens = estimate_num_tokens(msgs, api_kwargs.get("max_tokens"))
+                    limiter.acquire(estimated_tokens)
+                cc = self.get_sync_client().chat.completions.create(messages=msgs, **api_kwargs)
+                if self.usage is not None:
+                    self.usage.record(cc.usage)
+                if limiter is not None:
+                    limiter.reconcile(estimated_tokens, getattr(cc.usage, "total_tokens", None))
+                # Format API call response
+                response = self.parse_chat_completion_response(
+                    cc=cc, output_format=output_format, messages=messages, **api_kwargs
+                )
+                # Validation Callback
+                did_pass_validation = validation_callback(messages, response)
+                if did_pass_validation:
+                    retry_state.record("success")
+                    if self.cache is not None:
+                        self._write_cache(updated_kwargs, cc)
+                    return response
+                delay = retry_state.record("rejected")
+            except Exception as e:
+                delay = retry_state.record("error", e)
+                warnings.warn(
+                    f"Failed to create ChatCompletion with arguments: {updated_kwargs.items()}\n"
+                    f"Exception: {e}\n"
+                    f"Retries left: {retry_state.retries_left if delay is not None else 0}"
+                )
+            if delay is None:
+                return None
+            time.sleep(delay)
 
     def chat_completions(
         self,
@@ -278,15 +479,91 @@ class ChatModel:
                 cc_list += [cc]
         return cc_list
 
+    def _coalesce_key(self, msgs: list[dict[str, str]], api_kwargs: dict[str, Any]) -> str | None:
+        "Key for coalescing identical in-flight requests, or `None` if sampling is random."
+        temperature = api_kwargs.get("temperature")
+        is_deterministic = api_kwargs.get("seed") is not None and (
+            temperature is None or temperature <= self.coalesce_max_temperature
+        )
+        if not (self.coalesce_duplicates and is_deterministic):
+            return None
+        return request_key(msgs, api_kwargs)
+
+    async def _async_request(
+        self,
+        msgs: list[dict[str, str]],
+        api_kwargs: dict[str, Any],
+        semaphore: asyncio.Semaphore | AdaptiveConcurrencyLimiter | None = None,
+    ) -> ChatCompletion:
+        """Make API call with the async client, sharing the result of an identical
+        in-flight request if there is one.  Only calls that reach the API take a slot of
+        `semaphore` (if given) and wait on the rate limiter; requests sharing an in-flight
+        call take neither."""
+        key = self._coalesce_key(msgs, api_kwargs)
+        if key is not None:
+            inflight = self._inflight.get(key)
+            while inflight is not None and inflight.get_loop() is asyncio.get_running_loop():
+                try:
+                    return await asyncio.shield(inflight)
+                except asyncio.CancelledError:
+                    # Only the request we were sharing was cancelled, not this one:
+                    # make the request ourselves (or share the next identical one)
+                    if not inflight.cancelled() or asyncio.current_task().cancelling():
+                        raise
+                inflight = self._inflight.get(key)
+            future = asyncio.get_running_loop().create_future()
+            # Avoid "exception was never retrieved" warnings when there are no waiters
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._inflight[key] = future
+
+        try:
+            async with semaphore if semaphore is not None else contextlib.nullcontext():
+                # Wait for rate limit quota before dispatch
+                limiter = get_rate_limiter(api_kwargs["model"])
+                if limiter is not None:
+                    estimated_tokens = estimate_num_tokens(msgs, api_kwargs.get("max_tokens"))
+                    await limiter.async_acquire(estimated_tokens)
+                start_time = time.monotonic()
+                try:
+                    cc = await self.get_async_client().chat.completions.create(
+                        messages=msgs, **api_kwargs
+                    )
+                except Exception as api_exception:
+                    if self.concurrency_limiter is not None:
+                        self.concurrency_limiter.record_failure(
+                            api_exception, time.monotonic() - start_time
+                        )
+                    raise
+                if self.concurrency_limiter is not None:
+                    self.concurrency_limiter.record_success(time.monotonic() - start_time)
+            if self.usage is not None:
+                self.usage.record(cc.usage)
+            if limiter is not None:
+                limiter.reconcile(estimated_tokens, getattr(cc.usage, "total_tokens", None))
+        except BaseException as e:
+            if key is not None:
+                self._inflight.pop(key, None)
+                if isinstance(e, Exception):
+                    future.set_exception(e)
+                else:
+                    future.cancel()
+            raise
+        if key is not None:
+            self._inflight.pop(key, None)
+            future.set_result(cc)
+        return cc
+
     async def async_chat_completion(
         self,
         messages: MessagesType,
         output_format: str | None = None,
         num_retries: int = 5,
         validation_callback: Callable = validation_callback,
+        semaphore: asyncio.Semaphore | AdaptiveConcurrencyLimiter | None = None,
         **kwargs,
     ) -> ChatCompletionResponseType:
-        "Same as `chat_completion` but using asynchronous (non-blocking) client."
+        """Same as `chat_completion` but using asynchronous (non-blocking) client.
+        If given, every API call (including retries) waits for a slot of `semaphore`."""
         default_kwargs = {
             "messages": messages,
             "model": self.model,
@@ -298,79 +575,207 @@ class ChatModel:
         }
         updated_kwargs = default_kwargs | kwargs
 
-        async def attempt_retry(num_retries: int) -> ChatCompletionResponseType:
-            if num_retries > 0:
-                # Decrement retry counter, recursively call this method
-                return await self.async_chat_completion(
-                    **updated_kwargs, output_format=output_format, num_retries=num_retries
+        # Return cached response for identical request without calling API
+        if self.cache is not None:
+            cached_response = self._read_cache(updated_kwargs, output_format, validation_callback)
+            if cached_response is not None:
+                return cached_response
+            if self.cache.read_only:
+                warnings.warn(f"Response cache miss in read-only replay mode: {updated_kwargs}")
+                return None
+
+        # Format kwargs for API call
+        api_kwargs = updated_kwargs.copy()
+        msgs = api_kwargs.pop("messages")
+        if isinstance(msgs, Message):
+            msgs = msgs.messages
+
+        retry_state = RetryState(self.retry_policy, max_retries=num_retries)
+        while True:
+            try:
+                cc = await self._async_request(msgs, api_kwargs, semaphore)
+                # Format API call response
+                response = self.parse_chat_completion_response(
+                    cc=cc, output_format=output_format, messages=messages, **api_kwargs
                 )
-            else:
+                # Validation Callback
+                did_pass_validation = validation_callback(messages, response)
+                if did_pass_validation:
+                    retry_state.record("success")
+                    if self.cache is not None:
+                        self._write_cache(updated_kwargs, cc)
+                    return response
+                delay = retry_state.record("rejected")
+            except Exception as e:
+                delay = retry_state.record("error", e)
+                warnings.warn(
+                    f"Failed to create ChatCompletion with arguments: {updated_kwargs.items()}\n"
+                    f"Exception: {e}\n"
+                    f"Retries left: {retry_state.retries_left if delay is not None else 0}"
+                )
+            if delay is None:
                 return None
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _restore_result(value: Any, output_format: str | None) -> ChatCompletionResponseType:
+        "Convert a result read back from a `ResultSink` into the type of `output_format`."
+        match output_format:
+            case "bundle":
+                return Bundle(**value)
+            case "raw" | None:
+                from openai.types.chat.chat_completion import ChatCompletion
+
+                return ChatCompletion.model_validate(value)
+            case _:
+                return value
+
+    def concurrency_budget(
+        self, num_concurrent: int = 5
+    ) -> asyncio.BoundedSemaphore | AdaptiveConcurrencyLimiter:
+        """Semaphore bounding concurrent API calls: the adaptive window that persists across
+        calls if `adaptive_concurrency` is enabled, otherwise a new `num_concurrent` semaphore.
+        Pass it to `limited_chat_completion` to share one budget between several stages."""
+        if self.concurrency_limiter is not None:
+            return self.concurrency_limiter
+        return asyncio.BoundedSemaphore(num_concurrent)
+
+    async def limited_chat_completion(
+        self, semaphore: asyncio.Semaphore | AdaptiveConcurrencyLimiter, messages, **kwargs
+    ) -> ChatCompletionResponseType:
+        """Wrap ChatCompletion API call with a blocking semaphore to control concurrency.
+
+        A slot is held only while an API call is in flight: cache hits and requests sharing
+        an identical in-flight call take none, and each retry (including a request re-issued
+        after the call it shared failed or was cancelled) waits for a slot again."""
+        return await self.async_chat_completion(messages=messages, semaphore=semaphore, **kwargs)
 
+    async def iter_async_chat_completions(
+        self,
+        messages_iter: Iterable[MessagesType] | AsyncIterable[MessagesType],
+        num_concurrent: int = 5,
+        max_pending: int | None = None,
+        sink: ResultSink | None = None,
+        key_fn: Callable[[int, MessagesType], Any] | None = None,
+        **kwargs,
+    ) -> AsyncIterator[tuple[int, ChatCompletionResponseType]]:
+        """Streaming version of `async_chat_completions`.
+
+        Pulls messages lazily from `messages_iter` and keeps at most `max_pending` tasks
+        alive at once (default: twice the concurrency limit).  Yields `(index, result)` in
+        order of completion, where `index` is the position of the messages in
+        `messages_iter`.  Memory use stays flat regardless of the number of messages.
+
+        If a `sink` is given, each successful result is written to it under the key
+        `key_fn(index, messages)` (default: `index`) as soon as it completes, and messages
+        whose key is already in the sink are skipped without being yielded.  This allows
+        an interrupted run to resume, paying only for unfinished work.
+
+        Example Usage:
+        ```python
+        async for index, bundle in model.iter_async_chat_completions(
+            messages_generator, num_concurrent=10, output_format="bundle_dict"
+        ):
+            writer.write(index, bundle)
+        ```
+        """
+        # Create the shared semaphore, or use the adaptive window that persists across calls
+        semaphore = self.concurrency_budget(num_concurrent)
+        if self.concurrency_limiter is not None:
+            max_pending = max_pending or 2 * self.concurrency_limiter.max_limit
+        else:
+            max_pending = max_pending or 2 * num_concurrent
+
+        if isinstance(messages_iter, AsyncIterable):
+            messages_aiter = aiter(messages_iter)
+        else:
+            messages_aiter = None
+            messages_sync_iter = iter(messages_iter)
+
+        async def indexed_task(index: int, messages: MessagesType):
+            return index, await self.limited_chat_completion(semaphore, messages, **kwargs)
+
+        completed_keys = sink.completed_keys() if sink is not None else set()
+        pending_keys = {}
+        pending = set()
+        index = 0
+        exhausted = False
         try:
-            # Format kwargs for API call
-            api_kwargs = updated_kwargs.copy()
-            msgs = api_kwargs.pop("messages")
-            if isinstance(msgs, Message):
-                msgs = msgs.messages
-            cc = await self.async_client.chat.completions.create(messages=msgs, **api_kwargs)
-            # Format API call response
-            response = self.parse_chat_completion_response(
-                cc=cc, output_format=output_format, messages=messages, **api_kwargs
-            )
-            # Validation Callback
-            did_pass_validation = validation_callback(messages, response)
-            if did_pass_validation:
-                return response
-            else:
-                return await attempt_retry(num_retries=num_retries - 1)
-        except Exception as e:
-            warnings.warn(
-                f"Failed to create ChatCompletion with arguments: {updated_kwargs.items()}\n"
-                f"Exception: {e}\n"
-                f"Retries left: {num_retries}"
-            )
-            return await attempt_retry(num_retries=num_retries - 1)
+            while True:
+                # Top up the window of in-flight tasks
+                while not exhausted and len(pending) < max_pending:
+                    try:
+                        if messages_aiter is not None:
+                            messages = await anext(messages_aiter)
+                        else:
+                            messages = next(messages_sync_iter)
+                    except (StopIteration, StopAsyncIteration):
+                        exhausted = True
+                        break
+                    key = key_fn(index, messages) if key_fn is not None else index
+                    if str(key) not in completed_keys:
+                        pending.add(asyncio.create_task(indexed_task(index, messages)))
+                        pending_keys[index] = key
+                    index += 1
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result_index, result = task.result()
+                    key = pending_keys.pop(result_index)
+                    if sink is not None and result is not None:
+                        sink.write(key, result)
+                    yield result_index, result
+        finally:
+            # Consumer stopped early or was cancelled
+            for task in pending:
+                task.cancel()
 
     async def async_chat_completions(
         self,
         messages_list: list[MessagesType],
         num_concurrent: int = 5,
         timeout: int | None = None,
+        sink: ResultSink | None = None,
+        key_fn: Callable[[int, MessagesType], Any] | None = None,
         **kwargs,
     ) -> list[ChatCompletionResponseType]:
         """Calls `async_chat_completion` multiple times and returns a list of
-        ChatCompletion objects. Concurrency is controlled using `num_concurrent`."""
+        ChatCompletion objects. Concurrency is controlled using `num_concurrent`,
+        or by the adaptive `concurrency_limiter` if `adaptive_concurrency` is enabled.
+        Throughput is additionally bounded by the model's shared rate limiter, if configured.
+        See `iter_async_chat_completions` for streaming results from large datasets.
 
-        async def generation_task(semaphore, messages, **kwargs) -> ChatCompletionResponseType:
-            "Wrap ChatCompletion API call with a blocking semaphore to control concurrency."
-            async with semaphore:
-                cc = await self.async_chat_completion(messages=messages, **kwargs)
-                return cc
+        If a `sink` is given, results are persisted as they complete and results already
+        in the sink are returned without making API calls (see `iter_async_chat_completions`).
+        """
 
         async def generate_concurrent() -> list[ChatCompletionResponseType]:
             "Main task to schedule on asyncio event loop."
-            # Create the shared semaphore
-            semaphore = asyncio.BoundedSemaphore(num_concurrent)
-            # Create and schedule tasks, limiting concurrent tasks with semaphore
-            task_list = []
-            for messages in messages_list:
-                task = asyncio.create_task(
-                    generation_task(semaphore=semaphore, messages=messages, **kwargs)
-                )
-                task_list += [task]
+            cc_list = [None] * len(messages_list)
+            # Fill in results persisted by a previous run
+            if sink is not None:
+                stored = sink.read()
+                for index, messages in enumerate(messages_list):
+                    key = str(key_fn(index, messages) if key_fn is not None else index)
+                    if key in stored:
+                        cc_list[index] = self._restore_result(
+                            stored[key], kwargs.get("output_format")
+                        )
+            num_remaining = len(messages_list) - sum(cc is not None for cc in cc_list)
             # Await each task to complete with progress bar (returns in order of completion)
             with ProgressBar() as p:
-                for task in p.track(
-                    asyncio.as_completed(task_list),
-                    description="ChatCompletions",
-                    total=len(task_list),
+                task_id = p.add_task("ChatCompletions", total=num_remaining)
+                async for index, cc in self.iter_async_chat_completions(
+                    messages_list,
+                    num_concurrent=num_concurrent,
+                    sink=sink,
+                    key_fn=key_fn,
+                    **kwargs,
                 ):
-                    await task
-            # Await to ensure all tasks are done
-            await asyncio.wait(task_list)
-            # Return results in original order of tasks
-            cc_list = [await task for task in task_list]
+                    # Return results in original order of messages
+                    cc_list[index] = cc
+                    p.advance(task_id)
             return cc_list
 
         # Start the asyncio program
@@ -388,3 +793,58 @@ class ChatModel:
         else:
             result = asyncio.run(generate_concurrent())
         return result
+
+    def batch_chat_completions(
+        self,
+        messages_list: list[MessagesType],
+        output_format: str | None = None,
+        executor: BatchExecutor | None = None,
+        poll_interval: float = 30.0,
+        timeout: float | None = None,
+        directory: str | None = None,
+        **kwargs,
+    ) -> list[ChatCompletionResponseType]:
+        """Same as `async_chat_completions`, but run offline as one Batch API job.
+
+        The requests are serialized into the batch JSONL input format, submitted with
+        `executor` (default: the OpenAI Batch API with this model's `api_key` and
+        `base_url`), polled every `poll_interval` seconds, and the results are parsed in
+        the order of `messages_list`.  Failed requests give `None` (or an empty Bundle).
+        Use a `LocalBatchExecutor` to run batches against a local or mock endpoint.
+        Rate limiting, retries and response validation do not apply to batches.
+        """
+        from openai.types.chat.chat_completion import ChatCompletion
+
+        from automated_llm_eval.batch_api import OpenAIBatchExecutor
+
+        if executor is None:
+            executor = OpenAIBatchExecutor(api_key=self.api_key, base_url=self.base_url)
+        default_kwargs = {
+            "model": self.model,
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "max_tokens": self.max_tokens,
+            "n": self.n,
+            "seed": self.seed,
+        }
+        api_kwargs = default_kwargs | kwargs
+        requests = []
+        for messages in messages_list:
+            msgs = messages.messages if isinstance(messages, Message) else messages
+            body = {"messages": msgs} | api_kwargs
+            requests += [{k: v for k, v in body.items() if v is not None}]
+        bodies = executor.run(
+            requests, poll_interval=poll_interval, timeout=timeout, directory=directory
+        )
+
+        results = []
+        for messages, body in zip(messages_list, bodies):
+            cc = ChatCompletion.model_validate(body) if body is not None else None
+            if cc is not None and self.usage is not None:
+                self.usage.record(cc.usage)
+            results += [
+                self.parse_chat_completion_response(
+                    cc=cc, output_format=output_format, messages=messages, **api_kwargs
+                )
+            ]
+        return results
@@ -0,0 +1,110 @@
+import csv
+import hashlib
+import os
+import pickle
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+COMPARE_DATASET_PATH = "scored_examples/dataset_231103.csv"
+COMPARE_INDEX_CACHE_DIR = ".cache/compare_index"
+# Human rating columns aggregated per example `idx`
+RATING_COLUMNS = ["q1", "q2", "q3", "q4"]
+
+
+@dataclass
+class CompareDatasetIndex:
+    """Parsed compare dataset with per-example aggregates of the human ratings.
+
+    `rows` holds every CSV row (as strings, in file order).  `idx_to_mode` maps each
+    example `idx` to the mode of its `q2` ratings, which is the human label used for
+    policy tuning.  `idx_stats` holds the number of ratings and the mode of every
+    rating column for each `idx`.
+    """
+
+    fingerprint: tuple
+    rows: list[dict[str, str]] = field(repr=False)
+    idx_to_mode: dict[int, Any] = field(repr=False)
+    idx_stats: dict[int, dict[str, Any]] = field(repr=False)
+
+
+def file_fingerprint(path: str | Path, use_hash: bool = False) -> tuple:
+    "Identify a version of a file by (mtime, size), or by content hash if `use_hash`."
+    if use_hash:
+        with open(path, "rb") as file:
+            return ("sha256", hashlib.sha256(file.read()).hexdigest())
+    stat = os.stat(path)
+    return ("mtime", stat.st_mtime_ns, stat.st_size)
+
+
+def build_compare_index(path: str | Path, fingerprint: tuple) -> CompareDatasetIndex:
+    "Parse the compare dataset CSV once and precompute per-idx aggregates."
+    import pandas as pd
+
+    with open(path, "r") as file:
+        rows = list(csv.DictReader(file))
+    df = pd.DataFrame(rows)
+    # Parse rating columns the same way `pd.read_csv` would
+    for column in ["idx"] + [c for c in RATING_COLUMNS if c in df.columns]:
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+
+    def mode(x: pd.Series) -> Any:
+        # Smallest of the most common values, matching `Series.mode().iloc[0]`
+        return x.mode().iloc[0] if not x.mode().empty else None
+
+    grouped = df.groupby("idx")
+    idx_to_mode = grouped["q2"].apply(mode).to_dict()
+    idx_stats = {idx: {"num_ratings": int(count)} for idx, count in grouped.size().items()}
+    for column in RATING_COLUMNS:
+        if column not in df.columns:
+            continue
+        for idx, value in grouped[column].apply(mode).items():
+            idx_stats[idx][f"{column}_mode"] = value
+    return CompareDatasetIndex(
+        fingerprint=fingerprint, rows=rows, idx_to_mode=idx_to_mode, idx_stats=idx_stats
+    )
+
+
+_indexes: dict[str, CompareDatasetIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def load_compare_index(
+    path: str | Path = COMPARE_DATASET_PATH,
+    cache_dir: str | Path | None = COMPARE_INDEX_CACHE_DIR,
+    use_hash: bool = False,
+) -> CompareDatasetIndex:
+    """Load the compare dataset index, parsing the CSV only when it has changed.
+
+    The index is kept in memory and, if `cache_dir` is set, pickled to disk so that
+    later processes skip parsing too.  Both caches are invalidated when the CSV's
+    fingerprint changes (mtime and size, or content hash if `use_hash`).
+    """
+    fingerprint = file_fingerprint(path, use_hash=use_hash)
+    key = str(Path(path).resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None and index.fingerprint == fingerprint:
+            return index
+
+        cache_path = None
+        if cache_dir is not None:
+            cache_name = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+            cache_path = Path(cache_dir) / f"{cache_name}.pkl"
+            if cache_path.exists():
+                with open(cache_path, "rb") as file:
+                    index = pickle.load(file)
+                if index.fingerprint == fingerprint:
+                    _indexes[key] = index
+                    return index
+
+        index = build_compare_index(path, fingerprint)
+        _indexes[key] = index
+        if cache_path is not None:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as file:
+                pickle.dump(index, file)
+            os.replace(tmp_path, cache_path)
+        return index
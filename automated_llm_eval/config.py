@@ -0,0 +1,19 @@
+import os
+
+# Environment variable checked before falling back to `private_key.py`
+OPENAI_API_KEY_ENV_VAR = "OPENAI_API_KEY"
+
+
+def get_openai_api_key() -> str:
+    """Resolve the OpenAI API key.
+
+    Uses the `OPENAI_API_KEY` environment variable if set, otherwise
+    `key["open-ai"]` from the `private_key.py` module at the project root.
+    `private_key` is imported only when needed.
+    """
+    api_key = os.environ.get(OPENAI_API_KEY_ENV_VAR)
+    if api_key:
+        return api_key
+    import private_key
+
+    return private_key.key["open-ai"]
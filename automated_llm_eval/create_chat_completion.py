@@ -1,19 +1,69 @@
-import requests
-import json
+import asyncio
+import re
+import threading
 import time
+import weakref
+
+import httpx
 import requests
-import json
-import re
+from requests.adapters import HTTPAdapter
 
-def create_chat_completion(engine, 
-                           system_prompt, 
-                           user_prompt, 
-                           openai_token, 
-                           max_attempts=30, #5,
-                           temperature=0.9, 
-                           max_tokens= 768, #256, 
-                           top_p=0.9):
-    # set up API key
+from automated_llm_eval.utils import RetryPolicy, RetryState, on_loop_shutdown
+
+# Connect timeout is short; the read timeout must cover generating the whole completion
+DEFAULT_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+# Maximum number of keep-alive connections kept open to the API
+POOL_MAXSIZE = 32
+
+# Backoff is capped so a long outage cannot turn into hours of sleeping
+default_retry_policy = RetryPolicy(base_delay=1.0, max_delay=30.0, deadline=600.0)
+
+_session = None
+_session_lock = threading.Lock()
+# httpx.AsyncClient connections are bound to an event loop, so one client per loop
+_async_clients = weakref.WeakKeyDictionary()
+
+
+class ChatCompletionAPIError(Exception):
+    "Error response from the chat completions endpoint."
+
+    def __init__(self, response):
+        self.response = response
+        self.status_code = response.status_code
+        try:
+            error = response.json()["error"]
+        except Exception:
+            error = {}
+        self.code = error.get("code")
+        self.user_message = error.get("message") or response.text
+        super().__init__(f"Error code: {self.status_code} - {self.user_message}")
+
+
+def get_session():
+    "Shared `requests.Session` with a keep-alive connection pool."
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def get_async_client():
+    "Shared `httpx.AsyncClient` for the running event loop."
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        limits = httpx.Limits(max_connections=POOL_MAXSIZE, max_keepalive_connections=POOL_MAXSIZE)
+        client = httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, limits=limits)
+        _async_clients[loop] = client
+        on_loop_shutdown(client.aclose)
+    return client
+
+
+def _build_request(engine, system_prompt, user_prompt, openai_token, temperature, max_tokens, top_p):
     headers = {
       'Content-Type': 'application/json',
       'Authorization': f'Bearer {openai_token}'
@@ -21,28 +71,97 @@ def create_chat_completion(engine,
     data = {
         "model": engine,
         "temperature": temperature,
-        "top_p": top_p, 
-        "max_tokens": max_tokens, 
+        "top_p": top_p,
+        "max_tokens": max_tokens,
         "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ],
     }
-    for attempt in range(max_attempts):
+    return headers, data
+
+
+def _parse_response(response):
+    if response.status_code != 200:
+        raise ChatCompletionAPIError(response)
+    return response.json()['choices'][0]['message']['content'].strip()
+
+
+def _handle_failure(e, retry_state, user_prompt):
+    """Decide what to do after a failed attempt.  Returns the delay before the next attempt,
+    or a final `(text, user_prompt)` result for content-policy rejections.  Raises `e` if
+    no further attempt should be made."""
+    if re.search('content management policy', getattr(e, 'user_message', None) or ''):
+        return 'ERROR: ' + e.user_message, user_prompt
+    delay = retry_state.record("error", e)
+    if delay is None:
+        print(f"Prompt {user_prompt} failed after {retry_state.attempt} attempts. Aborting. Error: {e}")
+        raise e  # rethrow the last exception if all attempts fail
+    print(f"API call failed with error {e}. Retrying in {delay:.1f} seconds...")
+    return delay
+
+
+def create_chat_completion(engine,
+                           system_prompt,
+                           user_prompt,
+                           openai_token,
+                           max_attempts=30, #5,
+                           temperature=0.9,
+                           max_tokens= 768, #256,
+                           top_p=0.9,
+                           api_base='https://api.openai.com/v1',
+                           timeout=DEFAULT_TIMEOUT,
+                           retry_policy=default_retry_policy):
+    """Chat completion over a pooled keep-alive session.  Returns `(text, user_prompt)`.
+
+    Failed calls are retried up to `max_attempts` times with capped, jittered exponential
+    backoff (honoring `Retry-After`) under `retry_policy`; 4xx errors other than 408/409/429
+    are not retried.  The last exception is raised if every attempt fails.
+    """
+    headers, data = _build_request(engine, system_prompt, user_prompt, openai_token, temperature, max_tokens, top_p)
+    requests_timeout = (timeout.connect, timeout.read) if isinstance(timeout, httpx.Timeout) else timeout
+    retry_state = RetryState(retry_policy, max_retries=max_attempts - 1)
+    while True:
+        try:
+            response = get_session().post(f'{api_base}/chat/completions',
+                                          headers=headers,
+                                          json=data,
+                                          timeout=requests_timeout)
+            output_text = _parse_response(response)
+            retry_state.record("success")
+            return output_text, user_prompt
+        except Exception as e:
+            outcome = _handle_failure(e, retry_state, user_prompt)
+            if isinstance(outcome, tuple):
+                return outcome
+            time.sleep(outcome)
+
+
+async def async_create_chat_completion(engine,
+                                       system_prompt,
+                                       user_prompt,
+                                       openai_token,
+                                       max_attempts=30,
+                                       temperature=0.9,
+                                       max_tokens= 768,
+                                       top_p=0.9,
+                                       api_base='https://api.openai.com/v1',
+                                       timeout=DEFAULT_TIMEOUT,
+                                       retry_policy=default_retry_policy):
+    "Same as `create_chat_completion` but non-blocking, over a pooled `httpx.AsyncClient`."
+    headers, data = _build_request(engine, system_prompt, user_prompt, openai_token, temperature, max_tokens, top_p)
+    retry_state = RetryState(retry_policy, max_retries=max_attempts - 1)
+    while True:
         try:
-            response = requests.post('https://api.openai.com/v1/chat/completions', 
-                                     headers=headers, 
-                                     data=json.dumps(data))
-            output_text = response.json()['choices'][0]['message']['content']
-            return output_text.strip(), user_prompt
+            response = await get_async_client().post(f'{api_base}/chat/completions',
+                                                     headers=headers,
+                                                     json=data,
+                                                     timeout=timeout)
+            output_text = _parse_response(response)
+            retry_state.record("success")
+            return output_text, user_prompt
         except Exception as e:
-            if attempt < max_attempts - 1:  # i.e. if it's not the final attempt
-                sleep_dur = 2 ** attempt  # exponential backoff
-                print(f"API call failed with error {e}. Resampling examples and retrying in {sleep_dur} seconds...")
-                time.sleep(sleep_dur)
-            elif re.search('content management policy', e.user_message):
-                return 'ERROR: ' + e.user_message, user_prompt
-            else:
-                print(f"Prompt {user_prompt} failed after {max_attempts} attempts. Aborting. Error: {e}")
-                raise e  # rethrow the last exception if all attempts fail
-    return None, None  # If all attempts fail, return None
\ No newline at end of file
+            outcome = _handle_failure(e, retry_state, user_prompt)
+            if isinstance(outcome, tuple):
+                return outcome
+            await asyncio.sleep(outcome)
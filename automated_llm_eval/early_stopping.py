@@ -0,0 +1,70 @@
+import math
+from statistics import NormalDist
+
+
+class SequentialAccuracyTest:
+    """Sequential test of whether a policy can still beat `baseline` accuracy on a batch.
+
+    Results are fed in one at a time with `update` as they stream in.  The test stops
+    (`stop` becomes `True`) once the policy's final accuracy over the `total` labelled
+    examples of the batch is decided not to exceed `baseline`, either:
+    - exactly: even if every remaining example were correct, or
+    - with probability `confidence`: the upper one-sided Wilson bound on the accuracy of the
+      remaining examples, combined with the results so far, does not exceed `baseline`.
+      This is only applied after `min_samples` results.
+
+    Only losing policies are stopped: a policy that may beat `baseline` is always evaluated
+    on the whole batch, so its accuracy is exact and comparable to the incumbent's.
+
+    Example Usage:
+    ```python
+    test = SequentialAccuracyTest(baseline=0.6, total=len(batch))
+    for correct in results:
+        test.update(correct)
+        if test.stop:
+            break
+    ```
+    """
+
+    def __init__(
+        self, baseline: float, total: int, confidence: float = 0.95, min_samples: int = 8
+    ) -> None:
+        self.baseline = baseline
+        self.total = total
+        self.confidence = confidence
+        self.min_samples = min_samples
+        self.num_correct = 0
+        self.num_seen = 0
+        self._z = NormalDist().inv_cdf(confidence)
+
+    def update(self, correct: bool | None) -> None:
+        "Record the result of one example.  `None` (no human label) is ignored."
+        if correct is None:
+            return
+        self.num_seen += 1
+        self.num_correct += int(correct)
+
+    @property
+    def accuracy(self) -> float:
+        "Accuracy over the examples seen so far."
+        return self.num_correct / self.num_seen if self.num_seen else 0.0
+
+    def upper_bound(self) -> float:
+        "Upper confidence bound on the final accuracy over all `total` examples."
+        remaining = max(self.total - self.num_seen, 0)
+        if self.total == 0:
+            return 1.0
+        if remaining == 0:
+            return self.num_correct / self.total
+        if self.num_seen < self.min_samples:
+            return (self.num_correct + remaining) / self.total
+        n, p, z = self.num_seen, self.accuracy, self._z
+        center = p + z**2 / (2 * n)
+        margin = z * math.sqrt(p * (1 - p) / n + z**2 / (4 * n**2))
+        remaining_accuracy = min((center + margin) / (1 + z**2 / n), 1.0)
+        return (self.num_correct + remaining * remaining_accuracy) / self.total
+
+    @property
+    def stop(self) -> bool:
+        "Whether the policy is decided not to beat `baseline`."
+        return self.upper_bound() <= self.baseline
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable
+
+# Fields stored for every evaluated (policy, example) pair
+EVALUATION_FIELDS = ("agent_response", "agent_label", "human_label", "correct")
+
+
+def normalize_policy(policy: str) -> str:
+    "Normalize whitespace so that trivially reformatted policies hash the same."
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in policy.strip().splitlines()]
+    return "\n".join(line for line in lines if line)
+
+
+def policy_hash(policy: str, namespace: str = "") -> str:
+    """Content-addressed key of a policy.  `namespace` (e.g. the agent model and task) is
+    folded into the hash so that evaluations under different settings are kept apart."""
+    payload = json.dumps([namespace, normalize_policy(policy)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def model_settings(model: Any) -> str:
+    "Key of the agent model and sampling settings of a `ChatModel` that evaluations depend on."
+    settings = {
+        name: getattr(model, name)
+        for name in ("model", "temperature", "top_p", "max_tokens", "n", "seed")
+    }
+    return json.dumps(settings, sort_keys=True)
+
+
+class EvaluationStore:
+    """Persistent SQLite-backed memo of policy evaluations.
+
+    Each row holds the agent response, extracted label, human label and correctness of
+    one example evaluated under one policy, keyed by `(policy_hash, example_id)`.
+    Re-evaluating a policy that was seen before (e.g. when a mutation step fails and the
+    policy is unchanged) costs no API calls, and accuracy curves can be recomputed
+    offline from the stored rows.
+
+    The store's `namespace` (e.g. the task) and the `settings` passed to each call (e.g.
+    the agent model and its sampling settings, see `model_settings`) are folded into the
+    policy hash, so evaluations made under a different configuration are never reused.
+
+    Example Usage:
+    ```python
+    store = EvaluationStore("results/cache/policy_evaluations.sqlite")
+    settings = model_settings(model)
+    cached = store.get_many(policy, example_ids, settings)
+    ...
+    store.put(policy, example_id, {"agent_response": ..., "agent_label": 1, ...}, settings)
+    print(store.accuracy(policy, settings=settings))
+    ```
+    """
+
+    def __init__(self, path: str | Path, namespace: str = "") -> None:
+        self.path = Path(path)
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS policies ("
+            "policy_hash TEXT PRIMARY KEY, namespace TEXT NOT NULL, policy TEXT NOT NULL, "
+            "created REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS evaluations ("
+            "policy_hash TEXT NOT NULL, example_id TEXT NOT NULL, agent_response TEXT, "
+            "agent_label REAL, human_label REAL, correct INTEGER, created REAL NOT NULL, "
+            "PRIMARY KEY (policy_hash, example_id))"
+        )
+        self._conn.commit()
+
+    def _namespace(self, settings: str = "") -> str:
+        return f"{self.namespace}|{settings}" if settings else self.namespace
+
+    def _hash(self, policy: str, settings: str = "") -> str:
+        return policy_hash(policy, self._namespace(settings))
+
+    def get(self, policy: str, example_id: Any, settings: str = "") -> dict[str, Any] | None:
+        "Get the stored evaluation of `example_id` under `policy`, or `None` on a miss."
+        return self.get_many(policy, [example_id], settings).get(str(example_id))
+
+    def get_many(
+        self, policy: str, example_ids: Iterable[Any], settings: str = ""
+    ) -> dict[str, dict[str, Any]]:
+        "Get stored evaluations under `policy` as `{example_id: evaluation}` for the hits."
+        example_ids = list(dict.fromkeys(str(example_id) for example_id in example_ids))
+        key = self._hash(policy, settings)
+        results = {}
+        with self._lock:
+            for example_id in example_ids:
+                row = self._conn.execute(
+                    "SELECT agent_response, agent_label, human_label, correct FROM evaluations "
+                    "WHERE policy_hash = ? AND example_id = ?",
+                    (key, example_id),
+                ).fetchone()
+                if row is not None:
+                    results[example_id] = self._to_evaluation(row)
+            self.hits += len(results)
+            self.misses += len(example_ids) - len(results)
+        return results
+
+    @staticmethod
+    def _to_evaluation(row: tuple) -> dict[str, Any]:
+        evaluation = dict(zip(EVALUATION_FIELDS, row))
+        for field in ("agent_label", "human_label"):
+            value = evaluation[field]
+            if isinstance(value, float) and value.is_integer():
+                evaluation[field] = int(value)
+        if evaluation["correct"] is not None:
+            evaluation["correct"] = bool(evaluation["correct"])
+        return evaluation
+
+    def put(
+        self, policy: str, example_id: Any, evaluation: dict[str, Any], settings: str = ""
+    ) -> None:
+        "Store `evaluation` (a dict with the `EVALUATION_FIELDS`) of `example_id` under `policy`."
+        self.put_many(policy, {example_id: evaluation}, settings)
+
+    def put_many(
+        self, policy: str, evaluations: dict[Any, dict[str, Any]], settings: str = ""
+    ) -> None:
+        now = time.time()
+        key = self._hash(policy, settings)
+        rows = []
+        for example_id, evaluation in evaluations.items():
+            correct = evaluation.get("correct")
+            rows += [
+                (
+                    key,
+                    str(example_id),
+                    evaluation.get("agent_response"),
+                    evaluation.get("agent_label"),
+                    evaluation.get("human_label"),
+                    None if correct is None else int(correct),
+                    now,
+                )
+            ]
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO policies (policy_hash, namespace, policy, created) "
+                "VALUES (?, ?, ?, ?)",
+                (key, self._namespace(settings), policy, now),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO evaluations (policy_hash, example_id, agent_response, "
+                "agent_label, human_label, correct, created) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def accuracy(
+        self, policy: str, example_ids: Iterable[Any] | None = None, settings: str = ""
+    ) -> float | None:
+        """Fraction of stored evaluations under `policy` (restricted to `example_ids` if given)
+        that are correct.  Evaluations without a known correctness are excluded."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT example_id, correct FROM evaluations "
+                "WHERE policy_hash = ? AND correct IS NOT NULL",
+                (self._hash(policy, settings),),
+            ).fetchall()
+        if example_ids is not None:
+            wanted = {str(example_id) for example_id in example_ids}
+            rows = [row for row in rows if row[0] in wanted]
+        if not rows:
+            return None
+        return sum(correct for _, correct in rows) / len(rows)
+
+    def policies(self, settings: str = "") -> list[str]:
+        "All policies with stored evaluations in this namespace and settings, oldest first."
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT policy FROM policies WHERE namespace = ? ORDER BY created ASC",
+                (self._namespace(settings),),
+            ).fetchall()
+        return [policy for (policy,) in rows]
+
+    @property
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
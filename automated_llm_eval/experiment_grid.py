@@ -0,0 +1,230 @@
+"""Run the engine x judge x run grid of `model_performance` experiments concurrently.
+
+Cells run on a thread pool.  Every cell's requests wait on the shared per-model rate
+limiter of the model they target, so cells hitting different models draw on separate
+rate-limit pools while cells hitting the same model share one.
+
+Progress is tracked in a JSON manifest that is rewritten after every state change.  With
+`resume=True`, completed cells are skipped and unfinished cells continue from their
+per-question checkpoints (see `model_performance`).
+
+Example Usage:
+```python
+results = run_experiment_grid(
+    ["gpt-3.5-turbo", "gpt-4"],
+    ["gpt-4"],
+    run_number=3,
+    rate_limits={"gpt-4": (500, 30_000), "gpt-3.5-turbo": (3_500, 90_000)},
+    resume=True,
+)
+```
+"""
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from automated_llm_eval.utils import TokenUsage, configure_rate_limit
+
+MANIFEST_FILE_NAME = "grid_manifest.json"
+
+
+class GridCell(NamedTuple):
+    "One experiment: a run of `model_performance` for an engine and judge."
+    engine: str
+    engine_judge: str
+    run: int
+    path: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.engine} + {self.engine_judge} #{self.run}"
+
+
+def make_grid(
+    engine_options: list[str],
+    judge_options: list[str],
+    run_number: int,
+    base_directory: str | Path = "./data",
+) -> list[GridCell]:
+    "List grid cells, with result paths laid out as `{base}/{engine} + {judge}/..._Model_{i}.csv`."
+    cells = []
+    for engine in engine_options:
+        for engine_judge in judge_options:
+            directory = Path(base_directory) / f"{engine} + {engine_judge}"
+            for i in range(run_number):
+                path = directory / f"{engine}_{engine_judge}_Model_{i}.csv"
+                cells += [GridCell(engine, engine_judge, i, str(path))]
+    return cells
+
+
+class GridManifest:
+    """Status, wall time and token usage of every grid cell, persisted as JSON.
+
+    Each entry has `engine`, `engine_judge`, `run`, `path`, `status` ("pending",
+    "running", "done" or "failed"), `wall_time` (seconds, summed over attempts),
+    `usage` (requests and tokens, summed over attempts) and `error`.
+    The file is replaced atomically so that a crash never leaves it truncated.
+    """
+
+    def __init__(self, path: str | Path, cells: list[GridCell], resume: bool = True) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        stored = {}
+        if resume and self.path.exists():
+            with open(self.path, "r") as file:
+                stored = json.load(file)
+        self.entries: dict[str, dict[str, Any]] = {}
+        for cell in cells:
+            entry = stored.get(cell.key) or {
+                "status": "pending",
+                "wall_time": 0.0,
+                "usage": TokenUsage().as_dict(),
+                "error": None,
+            }
+            # A "running" entry is left over from a crashed run
+            if entry["status"] == "running":
+                entry["status"] = "pending"
+            self.entries[cell.key] = cell._asdict() | entry
+        self.save()
+
+    def save(self) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w") as file:
+                json.dump(self.entries, file, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def update(self, cell: GridCell, **fields: Any) -> None:
+        with self._lock:
+            self.entries[cell.key].update(fields)
+        self.save()
+
+    def is_done(self, cell: GridCell) -> bool:
+        return self.entries[cell.key]["status"] == "done" and Path(cell.path).exists()
+
+
+def run_cell(
+    cell: GridCell, manifest: GridManifest, openai_token: str, resume: bool, **kwargs
+) -> None:
+    "Run `model_performance` for one cell, recording its outcome in `manifest`."
+    from automated_llm_eval.model_performance import model_performance
+
+    entry = manifest.entries[cell.key]
+    previous_usage = entry["usage"]
+    usage = TokenUsage()
+    Path(cell.path).parent.mkdir(parents=True, exist_ok=True)
+    manifest.update(cell, status="running", error=None)
+    start_time = time.monotonic()
+    failed_questions: list[str] = []
+    try:
+        model_performance(
+            cell.engine,
+            cell.engine_judge,
+            openai_token,
+            cell.path,
+            resume=resume,
+            usage=usage,
+            failed_questions=failed_questions,
+            **kwargs,
+        )
+        if failed_questions:
+            # Not checkpointed, so resuming the grid retries just these questions
+            status = "failed"
+            error = f"{len(failed_questions)} question(s) failed after all retries"
+        else:
+            status, error = "done", None
+    except Exception:
+        status, error = "failed", traceback.format_exc()
+    manifest.update(
+        cell,
+        status=status,
+        error=error,
+        wall_time=entry["wall_time"] + time.monotonic() - start_time,
+        usage={k: previous_usage.get(k, 0) + v for k, v in usage.as_dict().items()},
+    )
+
+
+def print_grid_summary(manifest: GridManifest) -> None:
+    "Print per-cell wall time and token usage as a table."
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title="Experiment Grid")
+    for column in ["Engine", "Judge", "Run", "Status", "Wall Time (s)", "Requests", "Tokens"]:
+        table.add_column(column)
+    for entry in manifest.entries.values():
+        table.add_row(
+            entry["engine"],
+            entry["engine_judge"],
+            str(entry["run"]),
+            entry["status"],
+            f"{entry['wall_time']:.1f}",
+            str(entry["usage"]["requests"]),
+            str(entry["usage"]["total_tokens"]),
+        )
+    Console().print(table)
+
+
+def run_experiment_grid(
+    engine_options: list[str],
+    judge_options: list[str],
+    run_number: int,
+    openai_token: str | None = None,
+    base_directory: str | Path = "./data",
+    num_concurrent_cells: int = 4,
+    rate_limits: dict[str, tuple[int | None, int | None]] | None = None,
+    resume: bool = False,
+    manifest_path: str | Path | None = None,
+    **kwargs,
+) -> dict[str, dict[str, Any]]:
+    """Run `model_performance` for every engine x judge x run cell, `num_concurrent_cells`
+    at a time.
+
+    Args:
+        engine_options (list[str]): models generating the answers.
+        judge_options (list[str]): models judging the answers.
+        run_number (int): number of runs per (engine, judge) pair.
+        openai_token (str | None): API key; resolved with `get_openai_api_key` if `None`.
+        base_directory (str | Path): directory of the result CSVs and the manifest.
+        num_concurrent_cells (int): number of cells run at once.
+        rate_limits (dict[str, tuple[int | None, int | None]] | None): maps a model to its
+            (requests per minute, tokens per minute) quota, shared by every cell using it.
+        resume (bool): skip cells the manifest marks as done, and continue unfinished
+            cells from their checkpoints.  Otherwise every cell starts from scratch.
+        manifest_path (str | Path | None): defaults to `{base_directory}/grid_manifest.json`.
+        **kwargs: passed to `model_performance` (e.g. `num_concurrent_questions`).
+
+    Returns:
+        dict[str, dict[str, Any]]: final manifest entries, keyed by cell.
+    """
+    if openai_token is None:
+        from automated_llm_eval.config import get_openai_api_key
+
+        openai_token = get_openai_api_key()
+    for model, (requests_per_minute, tokens_per_minute) in (rate_limits or {}).items():
+        configure_rate_limit(
+            model, requests_per_minute=requests_per_minute, tokens_per_minute=tokens_per_minute
+        )
+
+    cells = make_grid(engine_options, judge_options, run_number, base_directory)
+    if manifest_path is None:
+        manifest_path = Path(base_directory) / MANIFEST_FILE_NAME
+    manifest = GridManifest(manifest_path, cells, resume=resume)
+
+    pending_cells = [cell for cell in cells if not (resume and manifest.is_done(cell))]
+    with ThreadPoolExecutor(max_workers=num_concurrent_cells) as executor:
+        futures = [
+            executor.submit(run_cell, cell, manifest, openai_token, resume, **kwargs)
+            for cell in pending_cells
+        ]
+        for future in futures:
+            future.result()
+
+    print_grid_summary(manifest)
+    return manifest.entries
@@ -0,0 +1,283 @@
+"""Local stand-in for the OpenAI `/v1/chat/completions` endpoint.
+
+Used for load-testing `ChatModel` and the legacy `create_chat_completion` path without
+spending money.  Latency, token counts, injected 429/5xx errors and `Retry-After`
+behavior are configurable.
+
+Example Usage:
+```python
+with MockOpenAIServer(MockServerConfig(latency_mean=0.2, rate_limit_error_rate=0.05)) as server:
+    client = openai.AsyncOpenAI(api_key="mock", base_url=server.base_url, max_retries=0)
+    model = ChatModel(async_client=client)
+    ...
+    print(server.stats)
+```
+
+Or from the command line:
+```sh
+python -m automated_llm_eval.mock_server --port 8000 --latency-mean 0.5 --error-rate-429 0.1
+```
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass(kw_only=True)
+class MockServerConfig:
+    "Behavior of the mock server."
+    # Latency distribution: "constant", "uniform" (mean +/- jitter) or "lognormal"
+    latency_distribution: str = "lognormal"
+    latency_mean: float = 0.1
+    latency_jitter: float = 0.05
+    # Completion length, drawn uniformly (capped by the request's `max_tokens`)
+    min_completion_tokens: int = 20
+    max_completion_tokens: int = 200
+    # Probability of responding with an injected error instead of a completion
+    rate_limit_error_rate: float = 0.0
+    server_error_rate: float = 0.0
+    # `Retry-After` seconds sent with 429 responses (`None` to omit the header)
+    retry_after: float | None = 1.0
+    # Template for the response text. `{score}` is filled with a random integer in
+    # `score_range`, mimicking the agent and judge responses used in this project.
+    response_template: str = "After reviewing the response, the score is {score}."
+    score_range: tuple[int, int] = (1, 10)
+
+    def sample_latency(self, rng: random.Random) -> float:
+        match self.latency_distribution:
+            case "constant":
+                return self.latency_mean
+            case "uniform":
+                return max(0.0, rng.uniform(-1, 1) * self.latency_jitter + self.latency_mean)
+            case "lognormal":
+                # Parameterize so the distribution has the requested mean and stdev
+                if self.latency_mean <= 0:
+                    return 0.0
+                sigma_squared = math.log(1 + (self.latency_jitter / self.latency_mean) ** 2)
+                mu = math.log(self.latency_mean) - sigma_squared / 2
+                return rng.lognormvariate(mu, math.sqrt(sigma_squared))
+            case _:
+                raise ValueError(f"Unknown latency distribution: {self.latency_distribution}")
+
+
+class MockServerStats:
+    "Thread-safe counters of requests served."
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.completions = 0
+        self.rate_limit_errors = 0
+        self.server_errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def increment(self, **counts: int) -> None:
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+
+    def as_dict(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "completions": self.completions,
+                "rate_limit_errors": self.rate_limit_errors,
+                "server_errors": self.server_errors,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
+
+def count_tokens(text: str) -> int:
+    "Approximate token count (4 characters per token)."
+    return max(1, len(text) // 4)
+
+
+def create_chat_completion_response(body: dict, config: MockServerConfig) -> dict:
+    "Build an OpenAI ChatCompletion JSON payload for a request `body`."
+    messages = body.get("messages", [])
+    seed = body.get("seed")
+    if seed is not None:
+        # Same seed and messages produce the same response, like the real API aims to
+        digest = hashlib.sha256(json.dumps([seed, messages], sort_keys=True).encode()).hexdigest()
+        rng = random.Random(int(digest[:16], 16))
+    else:
+        rng = random.Random()
+    prompt_tokens = sum(count_tokens(m.get("content") or "") + 4 for m in messages)
+    max_completion_tokens = config.max_completion_tokens
+    if body.get("max_tokens") is not None:
+        max_completion_tokens = min(max_completion_tokens, body["max_tokens"])
+    choices = []
+    completion_tokens = 0
+    min_completion_tokens = min(config.min_completion_tokens, max_completion_tokens)
+    for index in range(body.get("n") or 1):
+        num_tokens = rng.randint(min_completion_tokens, max_completion_tokens)
+        completion_tokens += num_tokens
+        content = config.response_template.format(score=rng.randint(*config.score_range))
+        choices += [
+            {
+                "index": index,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }
+        ]
+    return {
+        "id": f"chatcmpl-mock-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock-model"),
+        "system_fingerprint": "fp_mock",
+        "choices": choices,
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def make_handler(config: MockServerConfig, stats: MockServerStats) -> type[BaseHTTPRequestHandler]:
+    class MockOpenAIHandler(BaseHTTPRequestHandler):
+        # Keep-alive so that connection pooling behaves like it does against the real API
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+        def _send_json(self, status: int, payload: dict, headers: dict | None = None) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            try:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                # Client cancelled the request (e.g. early stopping) before the response
+                self.close_connection = True
+
+        def _send_error(self, status: int, message: str, error_type: str, headers=None) -> None:
+            payload = {
+                "error": {"message": message, "type": error_type, "param": None, "code": None}
+            }
+            self._send_json(status, payload, headers)
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length", 0))
+            raw_body = self.rfile.read(length)
+            if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+                self._send_error(404, f"Unknown path {self.path}", "invalid_request_error")
+                return
+            stats.increment(requests=1)
+            try:
+                body = json.loads(raw_body)
+            except json.JSONDecodeError:
+                self._send_error(400, "Could not parse JSON body", "invalid_request_error")
+                return
+
+            rng = random.Random()
+            time.sleep(config.sample_latency(rng))
+            draw = rng.random()
+            if draw < config.rate_limit_error_rate:
+                stats.increment(rate_limit_errors=1)
+                headers = {}
+                if config.retry_after is not None:
+                    headers["retry-after"] = str(config.retry_after)
+                self._send_error(429, "Rate limit reached (mock)", "requests", headers)
+                return
+            if draw < config.rate_limit_error_rate + config.server_error_rate:
+                stats.increment(server_errors=1)
+                self._send_error(500, "The server had an error (mock)", "server_error")
+                return
+
+            payload = create_chat_completion_response(body, config)
+            stats.increment(
+                completions=1,
+                prompt_tokens=payload["usage"]["prompt_tokens"],
+                completion_tokens=payload["usage"]["completion_tokens"],
+            )
+            self._send_json(200, payload)
+
+    return MockOpenAIHandler
+
+
+class MockOpenAIServer:
+    "Mock OpenAI server running on a background thread."
+
+    def __init__(
+        self, config: MockServerConfig | None = None, host: str = "127.0.0.1", port: int = 0
+    ) -> None:
+        self.config = config or MockServerConfig()
+        self._stats = MockServerStats()
+        self._server = ThreadingHTTPServer((host, port), make_handler(self.config, self._stats))
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return self._stats.as_dict()
+
+    def start(self) -> "MockOpenAIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a mock OpenAI chat completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-distribution", default="lognormal")
+    parser.add_argument("--latency-mean", type=float, default=0.1)
+    parser.add_argument("--latency-jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate-429", type=float, default=0.0)
+    parser.add_argument("--error-rate-500", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    args = parser.parse_args()
+    config = MockServerConfig(
+        latency_distribution=args.latency_distribution,
+        latency_mean=args.latency_mean,
+        latency_jitter=args.latency_jitter,
+        rate_limit_error_rate=args.error_rate_429,
+        server_error_rate=args.error_rate_500,
+        retry_after=args.retry_after,
+    )
+    server = MockOpenAIServer(config, host=args.host, port=args.port)
+    print(f"Mock OpenAI server listening at {server.base_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,12 @@
 import csv
 
-import pandas as pd
-
+from automated_llm_eval.compare_dataset import load_compare_index
 from automated_llm_eval.prompts import *
 
 
 def get_mode_score_compare():
-    df = pd.read_csv("scored_examples/dataset_231103.csv")
-    # Calculate the mode of 'q2' for each 'idx' group
-    mode_per_idx = df.groupby("idx")["q2"].apply(
-        lambda x: x.mode().iloc[0] if not x.mode().empty else None
-    )
-    # Create a dictionary mapping 'idx' to the mode of 'q2'
-    idx_to_mode = mode_per_idx.to_dict()
+    # Mapping of 'idx' to the mode of 'q2', precomputed once per version of the dataset
+    idx_to_mode = load_compare_index().idx_to_mode
     return idx_to_mode
 
 
@@ -32,20 +26,17 @@ def get_data_split(compare=True, compare_type="iii"):
             "target",
             "prompt",
         ]
-        with open("scored_examples/dataset_231103.csv", "r") as file:
-            # Parse the JSON data and store it as a dictionary
-            csv_reader = csv.DictReader(file)
-            # Iterate through each row in the CSV
-            for line_number, row in enumerate(csv_reader, start=1):
-                result = {}
-                if type(row) == list or row["dataset"] != compare_type:
-                    continue
-                for col in desired_columns:
-                    result[col] = row[col]
-                    if line_number % 5 == 0:
-                        test_data[line_number] = result
-                    else:
-                        train_data[line_number] = result
+        # Iterate through each row of the CSV (parsed once and shared via the index)
+        for line_number, row in enumerate(load_compare_index().rows, start=1):
+            result = {}
+            if type(row) == list or row["dataset"] != compare_type:
+                continue
+            for col in desired_columns:
+                result[col] = row[col]
+                if line_number % 5 == 0:
+                    test_data[line_number] = result
+                else:
+                    train_data[line_number] = result
 
     else:
         with open("scored_examples/harm_QA.csv", "r") as file:
@@ -1,7 +1,13 @@
+import asyncio
+import hashlib
 import logging
 import random
+from typing import Any, Callable
 
-from automated_llm_eval.chat_model import ChatModel, Message
+from automated_llm_eval.bundle_accuracy import BundleAccuracy
+from automated_llm_eval.chat_model import Bundle, ChatModel, Message
+from automated_llm_eval.early_stopping import SequentialAccuracyTest
+from automated_llm_eval.evaluation_store import EvaluationStore, model_settings, normalize_policy
 from automated_llm_eval.policy_helping_functions import (
     get_data_split,
     get_mode_score_compare,
@@ -17,7 +23,13 @@ from automated_llm_eval.prompts import (
     prompt_improvement_character_prompt,
     score_retrieval_character_prompt,
 )
-from automated_llm_eval.utils import sidethread_event_loop_async_runner
+from automated_llm_eval.result_sink import JSONLResultSink
+from automated_llm_eval.score_extraction import (
+    COMPARE_SCORE_RANGE,
+    SAFETY_SCORE_RANGE,
+    ScoreExtractor,
+)
+from automated_llm_eval.utils import ProgressBar, sidethread_event_loop_async_runner
 
 logger = logging.getLogger("PolicyTuneLogger")
 
@@ -29,7 +41,23 @@ def select_batch(dataset: dict, batch_size: int, seed: int = 42) -> list:
     return batch
 
 
+def get_example_id(example: dict) -> str:
+    "Stable ID of a dataset example, used to memoize its evaluations."
+    if "idx" in example:
+        return f"{example['dataset']}:{example['idx']}"
+    statement = example["LLM-Generated Statements"]
+    return "statement:" + hashlib.sha256(statement.encode("utf-8")).hexdigest()[:16]
+
+
+def is_correct(human_label, agent_label) -> bool | None:
+    "Whether the agent label matches the human label, or `None` if there is no human label."
+    if human_label is None or human_label != human_label:  # missing or NaN
+        return None
+    return agent_label is not None and float(human_label) == float(agent_label)
+
+
 def construct_compare_message(example: dict, current_policy: str) -> Message:
+    # Cached index: the dataset CSV is only parsed again if it changes on disk
     idx_to_mode = get_mode_score_compare()
     human_label = idx_to_mode[int(example["idx"])]
     statement = example["inputs"]
@@ -60,7 +88,9 @@ def construct_compare_message(example: dict, current_policy: str) -> Message:
 
 
 def construct_safety_message(example: dict, current_policy: str) -> Message:
-    statement = example["inputs"]
+    statement = example["LLM-Generated Statements"]
+    human_label = example["Human Label (Dev)"]
+    human_label = int(float(human_label)) if str(human_label).strip() else None
     safety_gpt_prompt = QA_AGENT_PROMPT.format(statement=statement, current_policy=current_policy)
     system_message = GPT_SYSTEM_PROMPT
     user_message = safety_gpt_prompt
@@ -68,7 +98,8 @@ def construct_safety_message(example: dict, current_policy: str) -> Message:
         messages=[
             {"role": "system", "content": system_message},
             {"role": "user", "content": user_message},
-        ]
+        ],
+        metadata={"human_label": human_label, "statement": statement},
     )
     return message
 
@@ -91,13 +122,109 @@ def construct_label_extraction_message(explanation: str) -> Message:
         messages=[
             {"role": "system", "content": system_message},
             {"role": "user", "content": user_message},
-        ]
+        ],
+        metadata={},
     )
 
 
-def generate_for_dataset(
+async def generate_and_extract_labels(
+    model: ChatModel,
+    msg_list: list[Message],
+    score_extractor: ScoreExtractor,
+    num_concurrent: int = 5,
+    groups: list[Any] | None = None,
+    should_stop: Callable[[int, Bundle | None, int | None], bool] | None = None,
+) -> tuple[list[Bundle | None], list[int | None]]:
+    """Two-stage pipeline: generate agent response, then extract its label.
+
+    Each example moves on to label extraction as soon as its own agent response arrives,
+    rather than waiting for the whole batch.  LLM extraction calls (for responses the
+    parsers cannot resolve) share one concurrency budget with the generation calls.
+
+    If given, `should_stop(index, bundle, label)` is called as each example completes.
+    When it returns `True`, the examples of the same group (see `groups`) that are still
+    pending or in flight are cancelled; their bundle and label are `None`.
+
+    Returns the agent response bundles and the extracted labels, in the order of `msg_list`.
+    """
+    budget = model.concurrency_budget(num_concurrent)
+
+    async def extract_with_llm(explanation: str) -> str | None:
+        return await model.limited_chat_completion(
+            budget, construct_label_extraction_message(explanation), output_format="simple"
+        )
+
+    async def process(index: int, msg: Message) -> tuple[Bundle | None, int | None]:
+        bundle = await model.limited_chat_completion(budget, msg, output_format="bundle")
+        label = None
+        if bundle is not None:
+            label = await score_extractor.async_extract(
+                bundle.response_message, async_llm_fallback=extract_with_llm
+            )
+        p.advance(task_id)
+        if should_stop is not None and should_stop(index, bundle, label):
+            for task in group_tasks[groups[index]]:
+                if task is not asyncio.current_task():
+                    task.cancel()
+        return bundle, label
+
+    if groups is None:
+        groups = [None] * len(msg_list)
+    with ProgressBar() as p:
+        task_id = p.add_task("Agent Labels", total=len(msg_list))
+        group_tasks = {}
+        tasks = []
+        for index, msg in enumerate(msg_list):
+            task = asyncio.ensure_future(process(index, msg))
+            group_tasks.setdefault(groups[index], []).append(task)
+            tasks += [task]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    # Cancelled examples have no result
+    results = [(None, None) if isinstance(r, BaseException) else r for r in results]
+    result_bundles = [bundle for bundle, _ in results]
+    agent_labels = [label for _, label in results]
+    return result_bundles, agent_labels
+
+
+async def mutate_policies(
+    model: ChatModel,
+    parents: list[tuple[str, list, list]],
+    num_candidates: int,
+    num_concurrent: int = 5,
+) -> list[str]:
+    """Generate `num_candidates` mutated policies concurrently.
+
+    `parents` are (policy, incorrect statements, correct statements) tuples; candidates are
+    spread over them round-robin.  Each request uses a different seed so that mutations
+    of the same parent differ.  Failed requests are dropped.
+    """
+    budget = model.concurrency_budget(num_concurrent)
+    requests = []
+    for k in range(num_candidates):
+        policy, incorrect_labelled, correct_labelled = parents[k % len(parents)]
+        agent_improvement = POLICY_MUTATE_PROMPT_TEMPLATE.format(
+            original_policy=policy,
+            correct_answers=correct_labelled,
+            incorrect_answers=incorrect_labelled,
+        )
+        messages = [
+            {"role": "system", "content": prompt_improvement_character_prompt},
+            {"role": "user", "content": agent_improvement},
+        ]
+        seed = None if model.seed is None else model.seed + k
+        requests += [
+            model.limited_chat_completion(budget, messages, output_format="simple", seed=seed)
+        ]
+    candidates = await asyncio.gather(*requests, return_exceptions=True)
+    return [candidate for candidate in candidates if isinstance(candidate, str) and candidate]
+
+
+def generate_for_policies(
     dataset: dict,
-    current_policy: str,
+    policies: list[str],
     batch_size: int,
     compare: bool,
     model: str = "gpt-3.5-turbo-1106",
@@ -106,96 +233,256 @@ def generate_for_dataset(
     max_tokens: int = 700,
     seed: int = 42,
     num_concurrent: int = 5,
-) -> list[Message]:
-    """Selects batch, formats messages, asynchronously makes LLM calls,
-    extract label from agent rationale."""
-    logger.info("Selecting Batch...")
-    batch = select_batch(dataset=dataset, batch_size=batch_size, compare=compare)
+    adaptive_concurrency: bool = False,
+    score_extractor: ScoreExtractor | None = None,
+    evaluation_store: EvaluationStore | None = None,
+    baseline: float | None = None,
+    confidence: float = 0.95,
+) -> list[list[dict]]:
+    """Evaluate every policy in `policies` on the same batch, all in one concurrent run.
 
-    logger.info("Create Message Prompts + Metadata")
-    msg_list = []
-    for example in batch:
-        msg = construct_message(example=example, current_policy=current_policy, compare=compare)
-        msg_list += [msg]
+    The requests of every policy go through one ChatModel and one concurrency budget (and
+    the model's shared rate limiter, if configured), so evaluating K policies takes about
+    as long as evaluating one policy on a K times larger batch.
+
+    If a `baseline` accuracy is given, each policy's results are streamed into a
+    `SequentialAccuracyTest`.  Once a policy is decided (exactly, or with probability
+    `confidence`) not to beat `baseline` on the batch, its remaining requests are cancelled
+    and only its completed examples are returned.  Policies that may beat `baseline` are
+    evaluated on the whole batch.
+
+    Returns one list of evaluated examples per policy (see `generate_for_dataset`).
+    """
+    logger.info("Selecting Batch...")
+    batch = select_batch(dataset=dataset, batch_size=batch_size)
+    example_ids = [get_example_id(example) for example in batch]
+    task = "compare" if compare else "safety"
 
     # Create ChatModel
     model = ChatModel(
-        model=model, temperature=temperature, top_p=top_p, max_tokens=max_tokens, seed=seed
+        model=model,
+        temperature=temperature,
+        top_p=top_p,
+        max_tokens=max_tokens,
+        seed=seed,
+        adaptive_concurrency=adaptive_concurrency,
     )
+    # Evaluations are only reused under the same agent model and sampling settings
+    settings = model_settings(model)
 
-    logger.info("Generate Agent Response (Label + CoT Explanation) for every example in batch")
-    result_bundles = sidethread_event_loop_async_runner(
-        async_function=model.async_chat_completions(
-            messages_list=msg_list, num_concurrent=num_concurrent, output_format="bundle"
-        )
-    )
-    agent_responses = [bundle.response_message for bundle in result_bundles]
-
-    logger.info("Use LLM to Extract agent label from responses")
-    agent_label_extraction_messages = [
-        construct_label_extraction_message(agent_response) for agent_response in agent_responses
-    ]
-    agent_label_results = sidethread_event_loop_async_runner(
-        async_function=model.async_chat_completions(
-            messages_list=agent_label_extraction_messages,
-            num_concurrent=num_concurrent,
-            output_format="simple",
-        )
-    )
+    logger.info("Create Message Prompts + Metadata")
+    msg_lists, memos, tests = [], [], []
+    # (policy index, batch position) of every example that needs an API call
+    new_positions = []
+    for p, policy in enumerate(policies):
+        msg_list = [
+            construct_message(example=example, current_policy=policy, task=task)
+            for example in batch
+        ]
+        memo = {}
+        if evaluation_store is not None:
+            memo = evaluation_store.get_many(policy, example_ids, settings)
+            logger.info(f"{len(memo)} of {len(batch)} examples already evaluated under policy")
+        test = None
+        if baseline is not None:
+            human_labels = [msg.metadata.get("human_label") for msg in msg_list]
+            total = sum(is_correct(human_label, None) is not None for human_label in human_labels)
+            test = SequentialAccuracyTest(baseline, total, confidence=confidence)
+            for example_id in example_ids:
+                if example_id in memo:
+                    test.update(memo[example_id]["correct"])
+        msg_lists += [msg_list]
+        memos += [memo]
+        tests += [test]
+        if test is not None and test.stop:
+            continue
+        new_positions += [
+            (p, i) for i, example_id in enumerate(example_ids) if example_id not in memo
+        ]
 
-    logger.info("Check that the label is an integer")
+    if score_extractor is None:
+        score_extractor = ScoreExtractor(COMPARE_SCORE_RANGE if compare else SAFETY_SCORE_RANGE)
 
-    def check_agent_label(label_str: str) -> int | None:
-        try:
-            response_int = int(label_str)
-            return response_int
-        except Exception:
-            return None
+    completed = {}
+
+    def record(index: int, bundle: Bundle | None, agent_label: int | None) -> bool:
+        "Record a completed example; returns whether its policy's evaluation can stop."
+        p, i = new_positions[index]
+        completed[p, i] = bundle, agent_label
+        test = tests[p]
+        if test is None:
+            return False
+        test.update(is_correct(msg_lists[p][i].metadata.get("human_label"), agent_label))
+        return test.stop
 
-    agent_labels = [check_agent_label(agent_label) for agent_label in agent_label_results]
+    if new_positions:
+        logger.info("Generate Agent Response (Label + CoT Explanation) and extract agent label")
+        sidethread_event_loop_async_runner(
+            async_function=generate_and_extract_labels(
+                model,
+                [msg_lists[p][i] for p, i in new_positions],
+                score_extractor,
+                num_concurrent=num_concurrent,
+                groups=[p for p, _ in new_positions],
+                should_stop=record,
+            )
+        )
+        logger.info(f"Score extraction stats: {score_extractor.stats}")
 
     logger.info("Update Messages metadata with the Generated Agent Response + Extracted Label")
-    updated_msg_list = []
-    for example_msg, agent_response, agent_label, bundle in zip(
-        msg_list, agent_responses, agent_labels, result_bundles
-    ):
-        updated_msg = example_msg.metadata | {
-            "agent_response": agent_response,
-            "agent_label": agent_label,
-            "bundle": bundle,
-        }
-        updated_msg_list += [updated_msg]
-    # Return all original messages with uppdated metadata
-    return updated_msg_list
-
-
-def check_policy_accuracy(dataset, current_policy, batchsize, compare):
+    updated_msg_lists = []
+    for p, (policy, msg_list, memo) in enumerate(zip(policies, msg_lists, memos)):
+        if tests[p] is not None and tests[p].stop:
+            logger.info(
+                f"Stopped early: policy {p} cannot beat accuracy {baseline} "
+                f"({tests[p].num_correct} of {tests[p].num_seen} correct)"
+            )
+        new_evaluations = {}
+        updated_msg_list = []
+        for i, (msg, example_id) in enumerate(zip(msg_list, example_ids)):
+            if example_id in memo:
+                updated_msg_list += [msg.metadata | memo[example_id] | {"bundle": None}]
+                continue
+            if (p, i) not in completed:
+                # Cancelled by early stopping
+                continue
+            bundle, agent_label = completed[p, i]
+            human_label = msg.metadata.get("human_label")
+            evaluation = {
+                "agent_response": bundle.response_message if bundle is not None else None,
+                "agent_label": agent_label,
+                "human_label": human_label,
+                "correct": is_correct(human_label, agent_label),
+            }
+            # Failed requests and unresolved labels are retried next time rather than memoized
+            if bundle is not None and agent_label is not None:
+                new_evaluations[example_id] = evaluation
+            updated_msg_list += [msg.metadata | evaluation | {"bundle": bundle}]
+        if evaluation_store is not None and new_evaluations:
+            evaluation_store.put_many(policy, new_evaluations, settings)
+        updated_msg_lists += [updated_msg_list]
+    return updated_msg_lists
+
+
+def generate_for_dataset(
+    dataset: dict,
+    current_policy: str,
+    batch_size: int,
+    compare: bool,
+    **kwargs,
+) -> list[dict]:
+    """Selects batch, formats messages, asynchronously makes LLM calls,
+    extract label from agent rationale.  If `adaptive_concurrency` is set,
+    `num_concurrent` is ignored in favor of an AIMD concurrency window.
+
+    Labels are parsed from the agent responses directly where possible; only responses
+    the parsers cannot resolve are sent to the LLM for extraction (see
+    `generate_and_extract_labels`).  Pass a `score_extractor` to customize the parsers or
+    to accumulate hit-rate stats across calls.
+
+    If an `evaluation_store` is given, examples already evaluated under `current_policy`
+    are taken from it without API calls (their "bundle" is `None`), and new evaluations
+    are added to it.
+
+    Returns the metadata of every message in the batch, updated with the agent response,
+    agent label, human label and correctness.  See `generate_for_policies` for the
+    remaining keyword arguments.
     """
-    return numerical accuracy score as well as COT statements
-    score, incorrect statements, correct statements
+    return generate_for_policies(dataset, [current_policy], batch_size, compare, **kwargs)[0]
+
+
+def check_policies_accuracy(
+    dataset, policies, batchsize, compare, evaluation_store=None, baseline=None
+):
+    """
+    Same as `check_policy_accuracy` for several policies evaluated concurrently on the same
+    batch; returns one (score, incorrect statements, correct statements, confusion counts)
+    per policy
     """
     logging.info("generating results")
-    results = generate_for_dataset(
-        dataset, current_policy=current_policy, batch_size=4, compare=compare
+    results = generate_for_policies(
+        dataset,
+        policies,
+        batch_size=4,
+        compare=compare,
+        evaluation_store=evaluation_store,
+        baseline=baseline,
     )
     logging.info("results generated")
-    return BundleAccuracy(results).accuracy()
+    return [BundleAccuracy(policy_results).accuracy() for policy_results in results]
+
 
+def check_policy_accuracy(
+    dataset, current_policy, batchsize, compare, evaluation_store=None, baseline=None
+):
+    """
+    return numerical accuracy score as well as COT statements
+    score, incorrect statements, correct statements, confusion counts
+
+    If `baseline` is given, evaluation stops early once the policy is decided not to beat
+    that accuracy; the score is then the accuracy on the examples evaluated so far
+    """
+    results = check_policies_accuracy(
+        dataset, [current_policy], batchsize, compare, evaluation_store, baseline
+    )
+    return results[0]
 
-def policy_tuning(output, compare, batch_size, compare_type="iii"):
+
+def policy_tuning(
+    output,
+    compare,
+    batch_size,
+    compare_type="iii",
+    resume=False,
+    evaluation_store_path="results/cache/policy_evaluations.sqlite",
+):
+    """Iteratively mutate the policy to improve labeling accuracy on the training set.
+
+    Each iteration is appended to a JSONL snapshot as soon as it completes.  With
+    `resume=True`, a crashed run continues from the last completed iteration.
+
+    Evaluations are memoized by (policy, example) in an `EvaluationStore` at
+    `evaluation_store_path` (`None` to disable), so re-evaluating an unchanged policy
+    costs no API calls.
+    """
     score = 0.0
     train_data, test_data = get_data_split(compare, compare_type)
     current_policy = get_policy_file(compare)
-    score_before, _, _ = check_policy_accuracy(test_data, current_policy, batch_size, compare)
+    evaluation_store = None
+    if evaluation_store_path is not None:
+        # Evaluations depend on the task as well as the policy (and on the agent model and
+        # sampling settings, which `generate_for_policies` adds to the key)
+        evaluation_store = EvaluationStore(
+            evaluation_store_path, namespace=f"{compare_type}|compare={compare}"
+        )
+    snapshot = JSONLResultSink(
+        f"results/csv/policy_mutation_snapshot_{compare_type}_compare{compare}.jsonl",
+        resume=resume,
+    )
+    stored = snapshot.read()
+    if "score_before" in stored:
+        score_before = stored.pop("score_before")
+    else:
+        score_before, _, _, _ = check_policy_accuracy(
+            test_data, current_policy, batch_size, compare, evaluation_store
+        )
+        snapshot.write("score_before", score_before)
     print("test score before", score_before)
     data = {}
     i = 0
+    # Restore progress from completed iterations of a previous run
+    for key, iteration in stored.items():
+        data[int(key)] = [iteration["policy"], iteration["score"]]
+        current_policy = iteration["next_policy"]
+        score = iteration["score"]
+        i = int(key) + 1
 
     while score < 0.9 and i < 10:
         print("score is", score, "and iteration is:", i)
-        score, incorrect_labelled, correct_labelled = check_policy_accuracy(
-            train_data, current_policy, batch_size, compare
+        score, incorrect_labelled, correct_labelled, confusion = check_policy_accuracy(
+            train_data, current_policy, batch_size, compare, evaluation_store
         )
+        print("confusion counts (human label -> agent label):", confusion)
         data[i] = [current_policy, score]
         AGENT_IMPROVEMENT = POLICY_MUTATE_PROMPT_TEMPLATE.format(
             original_policy=current_policy,
@@ -213,12 +500,142 @@ def policy_tuning(output, compare, batch_size, compare_type="iii"):
                 current_policy = current_policyNew
         except Exception:
             pass
-        save_as_csv(
-            data, f"results/csv/policy_mutation_snapshot_{compare_type}_compare{compare}.csv"
+        snapshot.write(
+            i,
+            {
+                "policy": data[i][0],
+                "score": score,
+                "confusion": confusion,
+                "next_policy": current_policy,
+            },
         )
+        snapshot.flush()
         i += 1
 
-    score_after, _, _ = check_policy_accuracy(test_data, current_policy, batch_size, compare)
+    snapshot.close()
+    score_after, _, _, _ = check_policy_accuracy(
+        test_data, current_policy, batch_size, compare, evaluation_store
+    )
     data["final scores"] = [score_before, score_after]
+    if evaluation_store is not None:
+        evaluation_store.close()
     save_as_csv(data, output)
     return current_policy
+
+
+def policy_beam_search(
+    output,
+    compare,
+    batch_size,
+    compare_type="iii",
+    beam_width=2,
+    num_candidates=4,
+    max_iters=10,
+    target_score=0.9,
+    num_concurrent=5,
+    early_stopping=True,
+    resume=False,
+    evaluation_store_path="results/cache/policy_evaluations.sqlite",
+):
+    """Beam search variant of `policy_tuning`.
+
+    Each iteration generates `num_candidates` mutations of the `beam_width` best policies
+    so far, all concurrently, then evaluates the candidates concurrently on the same
+    training batch and keeps the `beam_width` best of the beam and the candidates.
+    An iteration takes about as long as a `policy_tuning` iteration, but explores
+    `num_candidates` policies instead of one.
+
+    With `early_stopping`, once the beam is full a candidate's evaluation is cancelled as
+    soon as it is decided not to beat the worst policy in the beam (see
+    `SequentialAccuracyTest`), which saves most of the requests spent on losing candidates.
+
+    Each iteration's beam is appended to a JSONL snapshot; with `resume=True` a crashed run
+    continues from the last completed iteration.  Returns the best policy found.
+    """
+    train_data, test_data = get_data_split(compare, compare_type)
+    evaluation_store = None
+    if evaluation_store_path is not None:
+        evaluation_store = EvaluationStore(
+            evaluation_store_path, namespace=f"{compare_type}|compare={compare}"
+        )
+    snapshot = JSONLResultSink(
+        f"results/csv/policy_beam_snapshot_{compare_type}_compare{compare}.jsonl",
+        resume=resume,
+    )
+    stored = snapshot.read()
+    if "score_before" in stored:
+        score_before = stored.pop("score_before")
+    else:
+        score_before, _, _, _ = check_policy_accuracy(
+            test_data, get_policy_file(compare), batch_size, compare, evaluation_store
+        )
+        snapshot.write("score_before", score_before)
+    print("test score before", score_before)
+    data = {}
+    i = 0
+    beam_policies = [get_policy_file(compare)]
+    # Restore progress from completed iterations of a previous run
+    for key, iteration in stored.items():
+        data[int(key)] = [iteration["beam"][0], iteration["scores"][0]]
+        beam_policies = iteration["beam"]
+        i = int(key) + 1
+
+    # Re-scoring a restored beam is served from the evaluation store
+    beam_scores = check_policies_accuracy(
+        train_data, beam_policies, batch_size, compare, evaluation_store
+    )
+    beam = list(zip(beam_policies, beam_scores))
+    model = ChatModel(
+        model="gpt-3.5-turbo-1106", temperature=0.5, top_p=0.5, max_tokens=700, seed=42
+    )
+    while beam[0][1][0] < target_score and i < max_iters:
+        print("best score is", beam[0][1][0], "and iteration is:", i)
+        parents = [(policy, incorrect, correct) for policy, (_, incorrect, correct, _) in beam]
+        candidates = sidethread_event_loop_async_runner(
+            async_function=mutate_policies(model, parents, num_candidates, num_concurrent)
+        )
+        # Drop candidates identical to a beam policy or to another candidate
+        seen = {normalize_policy(policy) for policy, _ in beam}
+        new_policies = []
+        for candidate in candidates:
+            if normalize_policy(candidate) not in seen:
+                seen.add(normalize_policy(candidate))
+                new_policies += [candidate]
+        # Score needed to enter the beam
+        baseline = None
+        if early_stopping and len(beam) == beam_width:
+            baseline = beam[-1][1][0]
+        scored = []
+        if new_policies:
+            scored = list(
+                zip(
+                    new_policies,
+                    check_policies_accuracy(
+                        train_data, new_policies, batch_size, compare, evaluation_store, baseline
+                    ),
+                )
+            )
+        # Stable sort: on ties the incumbents stay ahead of the candidates
+        beam = sorted(beam + scored, key=lambda entry: entry[1][0], reverse=True)[:beam_width]
+        data[i] = [beam[0][0], beam[0][1][0]]
+        snapshot.write(
+            i,
+            {
+                "beam": [policy for policy, _ in beam],
+                "scores": [accuracy[0] for _, accuracy in beam],
+                "num_candidates": len(new_policies),
+            },
+        )
+        snapshot.flush()
+        i += 1
+
+    snapshot.close()
+    best_policy = beam[0][0]
+    score_after, _, _, _ = check_policy_accuracy(
+        test_data, best_policy, batch_size, compare, evaluation_store
+    )
+    data["final scores"] = [score_before, score_after]
+    if evaluation_store is not None:
+        evaluation_store.close()
+    save_as_csv(data, output)
+    return best_policy
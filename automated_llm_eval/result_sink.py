@@ -0,0 +1,193 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+
+def to_jsonable(value: Any) -> Any:
+    "Convert Bundles (NamedTuples) and pydantic models (ChatCompletion) into JSON-able types."
+    if hasattr(value, "_asdict"):
+        return {k: to_jsonable(v) for k, v in value._asdict().items()}
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    return value
+
+
+def truncate_partial_line(path: str | Path, chunk_size: int = 65536) -> None:
+    "Truncate a text file after its last newline, dropping a partially written last line."
+    with open(path, "rb+") as file:
+        end = file.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - chunk_size)
+            file.seek(start)
+            newline = file.read(position - start).rfind(b"\n")
+            if newline != -1:
+                position = start + newline + 1
+                break
+            position = start
+        if position != end:
+            file.truncate(position)
+
+
+class ResultSink:
+    """Append-only store of results keyed by a unique item key.
+
+    Results are persisted as they are produced so that a crashed run loses at most the
+    last unflushed batch.  With `resume=True`, existing results are kept and
+    `completed_keys()` reports which items can be skipped on restart; with `resume=False`,
+    any existing results at `path` are discarded.
+
+    Keys are stored as strings.
+    """
+
+    def write(self, key: Any, value: Any) -> None:
+        raise NotImplementedError
+
+    def read(self) -> dict[str, Any]:
+        "Get all stored results as a `{key: value}` dict in write order."
+        raise NotImplementedError
+
+    def completed_keys(self) -> set[str]:
+        return set(self.read().keys())
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "ResultSink":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class JSONLResultSink(ResultSink):
+    """Result sink backed by an append-only JSON Lines file.
+
+    Each line is `{"key": ..., "value": ...}`.  Writes are flushed and fsynced in
+    batches of `fsync_every` records or every `fsync_interval` seconds, whichever comes
+    first.  A partially written last line (e.g. from a crash) is ignored on read, and
+    truncated away on resume so that new records start on a line of their own.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        resume: bool = True,
+        fsync_every: int = 20,
+        fsync_interval: float = 5.0,
+    ) -> None:
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self.path.exists():
+            truncate_partial_line(self.path)
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def write(self, key: Any, value: Any) -> None:
+        line = json.dumps({"key": str(key), "value": to_jsonable(value)}, default=str)
+        self._file.write(line + "\n")
+        self._unsynced += 1
+        if (
+            self._unsynced >= self.fsync_every
+            or time.monotonic() - self._last_sync >= self.fsync_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if self._file.closed:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def read(self) -> dict[str, Any]:
+        self.flush()
+        results = {}
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                results[record["key"]] = record["value"]
+        return results
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+
+class ParquetResultSink(ResultSink):
+    """Result sink backed by a directory of Parquet files, one per row group.
+
+    Results are buffered and written as a new `part-XXXXX.parquet` row group every
+    `row_group_size` records.  Each part is written to a temporary file and atomically
+    renamed so that a crash never leaves a truncated part behind.  Values are stored
+    as JSON text alongside their key.  Requires `pyarrow` (the `parquet` extra).
+    """
+
+    def __init__(self, path: str | Path, resume: bool = True, row_group_size: int = 500) -> None:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError(
+                "ParquetResultSink requires `pyarrow`; install it with the `parquet` extra, "
+                "e.g. `pip install automated-llm-eval[parquet]`."
+            ) from e
+        self.path = Path(path)
+        self.row_group_size = row_group_size
+        self.path.mkdir(parents=True, exist_ok=True)
+        if not resume:
+            for part in self.path.glob("part-*.parquet"):
+                part.unlink()
+        self._buffer: list[dict[str, str]] = []
+        self._num_parts = len(list(self.path.glob("part-*.parquet")))
+
+    def write(self, key: Any, value: Any) -> None:
+        self._buffer += [{"key": str(key), "value": json.dumps(to_jsonable(value), default=str)}]
+        if len(self._buffer) >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pylist(self._buffer)
+        part_path = self.path / f"part-{self._num_parts:05d}.parquet"
+        tmp_path = part_path.with_suffix(".tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, part_path)
+        self._num_parts += 1
+        self._buffer = []
+
+    def read(self) -> dict[str, Any]:
+        import pyarrow.parquet as pq
+
+        self.flush()
+        results = {}
+        for part in sorted(self.path.glob("part-*.parquet")):
+            for record in pq.read_table(part).to_pylist():
+                results[record["key"]] = json.loads(record["value"])
+        return results
+
+
+def open_result_sink(path: str | Path, resume: bool = True, **kwargs) -> ResultSink:
+    "Create a JSONL sink for `*.jsonl` paths, otherwise a Parquet sink directory."
+    if str(path).endswith(".jsonl"):
+        return JSONLResultSink(path, resume=resume, **kwargs)
+    return ParquetResultSink(path, resume=resume, **kwargs)
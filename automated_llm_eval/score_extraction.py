@@ -0,0 +1,247 @@
+"""Extract numerical scores from free-text agent and judge responses.
+
+Most responses state the score in a predictable form ("The score is 7.", "Score: -1"),
+so compiled regex parsers are tried first and an LLM call (`SCORE_RETRIEVAL_PROMPT`) is
+only made for responses none of the parsers could resolve.
+
+Example Usage:
+```python
+extractor = ScoreExtractor(COMPARE_SCORE_RANGE, llm_fallback=my_llm_call)
+scores = extractor.extract_many(agent_responses)
+print(extractor.stats.as_dict())
+```
+"""
+import asyncio
+import re
+import threading
+from typing import Awaitable, Callable
+
+# Score scales asked for by the prompts and policies
+COMPARE_SCORE_RANGE = (-2, 2)
+SAFETY_SCORE_RANGE = (0, 2)
+AGENT_SCORE_RANGE = (1, 10)
+
+Score = int | float
+Parser = Callable[[str, tuple[int, int], bool], Score | None]
+
+_NUMBER = r"([+-]?\d+(?:\.\d+)?)"
+# Optional "out of N" suffix, e.g. "7/10" or "7 out of 10"
+_OUT_OF = r"(?:\s*(?:/|out\s+of)\s*\d+)?"
+_BARE_NUMBER_RE = re.compile(
+    r"^[^\w+-]*(?:(?:final\s+)?score\s*(?:is|of|[:=])?\s*)?" + _NUMBER + _OUT_OF + r"[\s.!)\]*]*$",
+    re.IGNORECASE,
+)
+_SCORE_PHRASE_RE = re.compile(
+    r"\b(?:score|rating|rated|rate\s+(?:it|this|the\s+\w+)(?:\s+as)?)\b"
+    # e.g. "score for summary B", "score of this answer"
+    r"(?:\s+(?:for\s+\w+(?:\s+\w+)?|of\s+this\s+\w+))?"
+    # A dash directly before a digit is the score's minus sign, not a separator
+    r"\s*(?:would\s+be|should\s+be|will\s+be|is|of|as|at|[:=]|-(?!\d)|=>)?\s*[*\"']*\s*"
+    + _NUMBER
+    + _OUT_OF
+    + r"(?![\d.]*\d)"
+    # A second candidate, e.g. "7 or 8" or "7-8", makes the phrase ambiguous
+    + r"(?P<alternative>\s*(?:or|to|and|-)\s*[+-]?\d)?"
+    # Thresholds such as "a score of 8 or above" are not the assigned score
+    + r"(?!\s*(?:or|and)\s+(?:above|higher|more|greater|below|lower|less|up))",
+    re.IGNORECASE,
+)
+_UNICODE_MINUS = str.maketrans({"−": "-", "–": "-", "—": "-"})
+
+
+def _to_score(match: str, score_range: tuple[int, int], integer: bool) -> Score | None:
+    value = float(match)
+    if value.is_integer():
+        value = int(value)
+    elif integer:
+        return None
+    if not score_range[0] <= value <= score_range[1]:
+        return None
+    return value
+
+
+def parse_bare_number(
+    text: str, score_range: tuple[int, int], integer: bool = True
+) -> Score | None:
+    "Parse a response that is only a number, e.g. '7', '-2', 'Score: 1.' or '8/10'."
+    match = _BARE_NUMBER_RE.match(text.translate(_UNICODE_MINUS))
+    if match is None:
+        return None
+    return _to_score(match.group(1), score_range, integer)
+
+
+def parse_score_phrase(
+    text: str, score_range: tuple[int, int], integer: bool = True
+) -> Score | None:
+    """Parse a score stated in a phrase such as 'the score is 7' or 'Score: -1'.
+
+    All phrases in the text must agree; responses that mention several different scores
+    (e.g. discussing why the score is not 2 but 1) or give a choice of scores (e.g. 'the
+    score is 7 or 8') are left for the next stage.
+    """
+    scores = set()
+    for match in _SCORE_PHRASE_RE.finditer(text.translate(_UNICODE_MINUS)):
+        if match.group("alternative"):
+            return None
+        score = _to_score(match.group(1), score_range, integer)
+        if score is not None:
+            scores.add(score)
+    if len(scores) != 1:
+        return None
+    return scores.pop()
+
+
+DEFAULT_PARSERS: list[tuple[str, Parser]] = [
+    ("bare_number", parse_bare_number),
+    ("score_phrase", parse_score_phrase),
+]
+
+
+class ExtractionStats:
+    "Thread-safe counts of which extraction stage resolved each response."
+
+    def __init__(self, stages: list[str]) -> None:
+        self._lock = threading.Lock()
+        self.stages = list(stages)
+        self.counts = {stage: 0 for stage in self.stages}
+
+    def increment(self, stage: str) -> None:
+        with self._lock:
+            self.counts[stage] += 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def llm_calls_saved(self) -> int:
+        "Responses resolved without an LLM call."
+        return sum(self.counts[s] for s in self.stages if s not in ("llm", "unresolved"))
+
+    def as_dict(self) -> dict[str, int | float]:
+        with self._lock:
+            total = sum(self.counts.values())
+            stats: dict[str, int | float] = {"total": total}
+            for stage, count in self.counts.items():
+                stats[stage] = count
+                stats[f"{stage}_rate"] = count / total if total else 0.0
+        return stats
+
+    def __repr__(self) -> str:
+        return f"ExtractionStats({self.as_dict()})"
+
+
+class ScoreExtractor:
+    """Pipeline of deterministic score parsers followed by an optional LLM fallback.
+
+    Args:
+        score_range (tuple[int, int]): inclusive range of valid scores.  Numbers outside of
+            the range are not accepted by the parsers.
+        integer (bool): whether only whole-number scores are valid.
+        parsers (list[tuple[str, Parser]] | None): named parser stages tried in order.
+            Defaults to `DEFAULT_PARSERS`.
+        llm_fallback (Callable[[str], str | None] | None): called with a response that no
+            parser resolved; should return the LLM's answer to `SCORE_RETRIEVAL_PROMPT`.
+        batch_llm_fallback (Callable[[list[str]], list[str | None]] | None): batched version
+            of `llm_fallback` used by `extract_many`, e.g. backed by
+            `ChatModel.async_chat_completions`.
+        async_llm_fallback (Callable[[str], Awaitable[str | None]] | None): async version of
+            `llm_fallback` used by `async_extract`.
+
+    Per-stage hit counts ("llm" and "unresolved" included) are kept at `stats`.
+    """
+
+    def __init__(
+        self,
+        score_range: tuple[int, int] = AGENT_SCORE_RANGE,
+        integer: bool = True,
+        parsers: list[tuple[str, Parser]] | None = None,
+        llm_fallback: Callable[[str], str | None] | None = None,
+        batch_llm_fallback: Callable[[list[str]], list[str | None]] | None = None,
+        async_llm_fallback: Callable[[str], Awaitable[str | None]] | None = None,
+    ) -> None:
+        self.score_range = score_range
+        self.integer = integer
+        self.parsers = parsers if parsers is not None else DEFAULT_PARSERS
+        self.llm_fallback = llm_fallback
+        self.batch_llm_fallback = batch_llm_fallback
+        self.async_llm_fallback = async_llm_fallback
+        self.stats = ExtractionStats([name for name, _ in self.parsers] + ["llm", "unresolved"])
+
+    def _parse(self, text: str | None) -> tuple[Score | None, str | None]:
+        if not text:
+            return None, None
+        for name, parser in self.parsers:
+            score = parser(text, self.score_range, self.integer)
+            if score is not None:
+                return score, name
+        return None, None
+
+    def parse(self, text: str | None) -> Score | None:
+        "Extract score with the deterministic parsers only.  Unresolved responses are not counted."
+        score, stage = self._parse(text)
+        if stage is not None:
+            self.stats.increment(stage)
+        return score
+
+    def _parse_llm_answer(self, answer: str | None) -> Score | None:
+        score, _ = self._parse(answer)
+        self.stats.increment("llm" if score is not None else "unresolved")
+        return score
+
+    def extract(self, text: str | None) -> Score | None:
+        "Extract score from `text`, calling the LLM fallback only if no parser matched."
+        score, stage = self._parse(text)
+        if stage is not None:
+            self.stats.increment(stage)
+            return score
+        if self.llm_fallback is None or not text:
+            self.stats.increment("unresolved")
+            return None
+        return self._parse_llm_answer(self.llm_fallback(text))
+
+    async def async_extract(
+        self,
+        text: str | None,
+        async_llm_fallback: Callable[[str], Awaitable[str | None]] | None = None,
+    ) -> Score | None:
+        """Same as `extract` but awaits `async_llm_fallback` (or `llm_fallback` on a thread).
+        An `async_llm_fallback` passed here is used for this call instead of the extractor's."""
+        score, stage = self._parse(text)
+        if stage is not None:
+            self.stats.increment(stage)
+            return score
+        async_llm_fallback = async_llm_fallback or self.async_llm_fallback
+        if async_llm_fallback is not None and text:
+            return self._parse_llm_answer(await async_llm_fallback(text))
+        if self.llm_fallback is not None and text:
+            return self._parse_llm_answer(await asyncio.to_thread(self.llm_fallback, text))
+        self.stats.increment("unresolved")
+        return None
+
+    def extract_many(self, texts: list[str | None]) -> list[Score | None]:
+        """Extract scores from all `texts`, sending only the unresolved ones to the LLM
+        fallback (in one batch if `batch_llm_fallback` is set)."""
+        scores: list[Score | None] = []
+        unresolved = []
+        for i, text in enumerate(texts):
+            score, stage = self._parse(text)
+            scores += [score]
+            if stage is not None:
+                self.stats.increment(stage)
+            elif text:
+                unresolved += [i]
+            else:
+                self.stats.increment("unresolved")
+        if not unresolved:
+            return scores
+
+        if self.batch_llm_fallback is not None:
+            answers = self.batch_llm_fallback([texts[i] for i in unresolved])
+        elif self.llm_fallback is not None:
+            answers = [self.llm_fallback(texts[i]) for i in unresolved]
+        else:
+            answers = [None] * len(unresolved)
+        for i, answer in zip(unresolved, answers):
+            scores[i] = self._parse_llm_answer(answer)
+        return scores
@@ -1,16 +1,19 @@
+run_number = 3
 
-import os
-from automated_llm_eval.model_performance import *
-from private_key import *
+def run_test(engine_options, judge_options, num_concurrent_cells=4, rate_limits=None, resume=False):
+    """Run every engine x judge x `run_number` experiment, `num_concurrent_cells` at a time.
 
-openai_token = key["open-ai"]
-run_number = 3
+    `rate_limits` maps a model to its (requests per minute, tokens per minute) quota.
+    With `resume=True`, an interrupted grid continues where it left off
+    (see `data/grid_manifest.json`).
+    """
+    # Imported here so that importing `run_number` (e.g. from model_analysis) stays cheap
+    from automated_llm_eval.experiment_grid import run_experiment_grid
 
-def run_test(engine_options, judge_options):
-    for engine in engine_options:
-        for engine_judge in judge_options:
-            base_directory = "./data"+f"/{engine} + {engine_judge}"
-            os.makedirs(base_directory, exist_ok=True)
-            for i in range(run_number):
-                file_name =base_directory+f"/{engine}_{engine_judge}_Model_{i}.csv"
-                model_performance(engine, engine_judge, openai_token, file_name)
\ No newline at end of file
+    return run_experiment_grid(engine_options,
+                               judge_options,
+                               run_number,
+                               base_directory="./data",
+                               num_concurrent_cells=num_concurrent_cells,
+                               rate_limits=rate_limits,
+                               resume=resume)
@@ -1,4 +1,17 @@
 from .async_run import *
+from .concurrency import *
 from .progress_bar import *
+from .rate_limit import *
+from .response_cache import *
+from .retry import *
+from .usage import *
 
-__all__ = ["async_run", "progress_bar"]
+__all__ = [
+    "async_run",
+    "concurrency",
+    "progress_bar",
+    "rate_limit",
+    "response_cache",
+    "retry",
+    "usage",
+]
@@ -1,45 +1,137 @@
 import asyncio
+import atexit
 import threading
-import time
-from typing import Any, Callable
+import weakref
+from typing import Any, Awaitable, Callable, Coroutine
 
+# Cleanup callbacks (e.g. closing HTTP clients) for resources bound to an event loop
+_loop_shutdown_callbacks: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, list[Callable[[], Awaitable[Any]]]
+] = weakref.WeakKeyDictionary()
 
-def sidethread_event_loop_async_runner(async_function: Callable) -> Any:
+
+def on_loop_shutdown(callback: Callable[[], Awaitable[Any]]) -> None:
+    """Register an async `callback` to be awaited before the running event loop is closed
+    by `BackgroundEventLoop.shutdown`.  Loops not managed by a `BackgroundEventLoop` never
+    run their callbacks."""
+    loop = asyncio.get_running_loop()
+    _loop_shutdown_callbacks.setdefault(loop, []).append(callback)
+
+
+class BackgroundEventLoop:
+    """Long-lived event loop running on a dedicated daemon thread.
+
+    Coroutines submitted with `run` execute on the same loop every time, so resources
+    bound to the loop (e.g. the `AsyncOpenAI` connection pool) are reused across calls.
+    The loop and thread are started on first use.
+
+    Example Usage:
+    ```python
+    runner = BackgroundEventLoop()
+    result = runner.run(model.async_chat_completions(messages_list))
+    runner.shutdown()
+    ```
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                started = threading.Event()
+
+                def run_forever() -> None:
+                    asyncio.set_event_loop(self._loop)
+                    self._loop.call_soon(started.set)
+                    self._loop.run_forever()
+
+                self._thread = threading.Thread(
+                    target=run_forever, name="BackgroundEventLoop", daemon=True
+                )
+                self._thread.start()
+                started.wait()
+            return self._loop
+
+    def run(self, coroutine: Coroutine, timeout: float | None = None) -> Any:
+        """Run `coroutine` on the background loop, blocking until its result is ready.
+
+        Safe to call from several threads at once; their coroutines run concurrently.
+        Must not be called from the loop's own thread, which would deadlock.
+        """
+        if threading.current_thread() is self._thread:
+            coroutine.close()
+            raise RuntimeError("BackgroundEventLoop.run called from its own event loop thread.")
+        loop = self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    async def _cleanup(self) -> None:
+        for callback in _loop_shutdown_callbacks.pop(asyncio.get_running_loop(), []):
+            try:
+                await callback()
+            except Exception:
+                pass
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.get_running_loop().shutdown_asyncgens()
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        "Cancel pending tasks, run shutdown callbacks, then stop and close the loop."
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+        if loop is None or loop.is_closed():
+            return
+        if thread is not None and thread.is_alive():
+            try:
+                asyncio.run_coroutine_threadsafe(self._cleanup(), loop).result(timeout)
+            except Exception:
+                pass
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+        if not loop.is_running():
+            loop.close()
+
+
+_background_loop: BackgroundEventLoop | None = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundEventLoop:
+    "Get the process-wide `BackgroundEventLoop`, shut down automatically at exit."
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = BackgroundEventLoop()
+            atexit.register(_background_loop.shutdown)
+        return _background_loop
+
+
+def sidethread_event_loop_async_runner(async_function: Coroutine) -> Any:
     """Runs an async function on another thread, blocking until result complete.
 
-    This creates a thread and event loop on that thread.  The async function
-    is run on that event loop.  When the async function completes, it stops and closes
-    the event loop and thread.
+    The coroutine is run on the shared, long-lived background event loop (see
+    `get_background_loop`), so no thread or event loop is created per call.
 
     Args:
-        async_function (Callable): async function.  This should be defined with
-            `async def`.
+        async_function (Coroutine): coroutine object, i.e. the result of calling a
+            function defined with `async def`.
 
     Returns:
         Any: The return value of `async_function`.
     """
-    # Create new event loop
-    event_loop_a = asyncio.new_event_loop()
-
-    def run_forever_safe(loop) -> None:
-        asyncio.set_event_loop(loop)
-        loop.run_forever()
-        # NOTE: Event loop runs until `loop.stop()` is called.
-        # This will also cause this `target` for thread to complete and stop the thread.
-
-    # Place event loop on a dedicated thread & run the event loop
-    thread = threading.Thread(target=lambda: run_forever_safe(event_loop_a))
-    thread.start()
-
-    # Execute asyncio function on the event loop on other thread (so we don't block main thread)
-    future = asyncio.run_coroutine_threadsafe(async_function, event_loop_a)
-    # Wait for the result
-    result = future.result()
-    # Stop event loop on other thread
-    event_loop_a.call_soon_threadsafe(event_loop_a.stop)
-    # Block main thread until event loop stopped
-    while event_loop_a.is_running():
-        time.sleep(0.1)
-    # Close event loop now that it is no longer running
-    event_loop_a.close
-    return result
+    return get_background_loop().run(async_function)
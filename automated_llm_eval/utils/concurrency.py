@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import statistics
+import time
+from collections import deque
+from typing import NamedTuple
+
+concurrency_logger = logging.getLogger(name="ConcurrencyLogger")
+
+
+class WindowChange(NamedTuple):
+    "Record of a change to the adaptive concurrency window."
+    timestamp: float
+    limit: int
+    reason: str
+
+
+def is_congestion_error(exception: BaseException) -> bool:
+    """Whether an exception signals that the endpoint is overloaded
+    (HTTP 429, HTTP 5xx, or a timeout) rather than a problem with the request itself."""
+    if isinstance(exception, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    if "Timeout" in type(exception).__name__:
+        return True
+    status_code = getattr(exception, "status_code", None)
+    return status_code is not None and (status_code == 429 or status_code >= 500)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Additive-increase/multiplicative-decrease (AIMD) limit on in-flight requests.
+
+    The window grows by `additive_increase` once every `limit` successful requests
+    (roughly once per round of the current window) while latency is healthy.  It is
+    multiplied by `multiplicative_decrease` when a request fails with a 429, 5xx or
+    timeout, or when the p95 latency of the most recent `latency_window` requests exceeds
+    `latency_spike_factor` times the best p95 observed so far.  Failures from requests
+    dispatched before the last decrease are ignored so that one burst of errors only
+    cuts the window once.
+
+    Every change is appended to `history` so the trajectory of a run can be inspected.
+
+    This limiter is used from a single asyncio event loop at a time.
+
+    Example Usage:
+    ```python
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=5, max_limit=50)
+    async with limiter:
+        start = time.monotonic()
+        response = await make_request()
+        limiter.record_success(time.monotonic() - start)
+    print(limiter.limit, limiter.history)
+    ```
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 5,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        additive_increase: int = 1,
+        multiplicative_decrease: float = 0.5,
+        latency_window: int = 20,
+        latency_spike_factor: float = 2.0,
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.additive_increase = additive_increase
+        self.multiplicative_decrease = multiplicative_decrease
+        self.latency_window = latency_window
+        self.latency_spike_factor = latency_spike_factor
+        self.limit = max(min_limit, min(initial_limit, max_limit))
+        self.in_flight = 0
+        self.history: list[WindowChange] = [WindowChange(time.time(), self.limit, "initial")]
+        self._waiters: deque[asyncio.Future] = deque()
+        self._successes_since_change = 0
+        self._latencies: list[float] = []
+        self._baseline_p95: float | None = None
+        self._last_decrease = float("-inf")
+
+    async def acquire(self) -> None:
+        "Wait until there is room in the concurrency window."
+        while self.in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Cancelled after being woken: hand the slot on to the next waiter
+                if waiter.done() and not waiter.cancelled():
+                    self._wake_waiters()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake_waiters()
+
+    async def __aenter__(self) -> "AdaptiveConcurrencyLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.release()
+
+    def _wake_waiters(self) -> None:
+        available = self.limit - self.in_flight
+        while available > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                available -= 1
+
+    def _set_limit(self, new_limit: int, reason: str) -> None:
+        new_limit = max(self.min_limit, min(new_limit, self.max_limit))
+        self._successes_since_change = 0
+        if new_limit == self.limit:
+            return
+        concurrency_logger.info(f"Concurrency window {self.limit} -> {new_limit} ({reason})")
+        self.limit = new_limit
+        self.history += [WindowChange(time.time(), new_limit, reason)]
+        self._wake_waiters()
+
+    def _decrease(self, reason: str) -> None:
+        self._last_decrease = time.monotonic()
+        self._set_limit(int(self.limit * self.multiplicative_decrease), reason)
+
+    def record_success(self, latency: float) -> None:
+        "Report a successful request that took `latency` seconds."
+        self._latencies += [latency]
+        if len(self._latencies) >= self.latency_window:
+            p95 = statistics.quantiles(self._latencies, n=20)[-1]
+            self._latencies = []
+            if self._baseline_p95 is None or p95 < self._baseline_p95:
+                self._baseline_p95 = p95
+            elif p95 > self.latency_spike_factor * self._baseline_p95:
+                self._decrease(f"p95 latency spike {p95:.2f}s")
+                return
+        self._successes_since_change += 1
+        if self._successes_since_change >= self.limit:
+            self._set_limit(self.limit + self.additive_increase, "healthy")
+
+    def record_failure(self, exception: BaseException, latency: float) -> None:
+        "Report a failed request.  Only congestion errors shrink the window."
+        if not is_congestion_error(exception):
+            return
+        started = time.monotonic() - latency
+        if started < self._last_decrease:
+            return
+        self._decrease(type(exception).__name__)
@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import time
+
+# Rough characters-per-token ratio for English text with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+# Per-message overhead for role/formatting tokens in the chat format
+TOKENS_PER_MESSAGE = 4
+# Completion size assumed when a request does not set `max_tokens`
+DEFAULT_COMPLETION_TOKENS = 256
+
+
+class TokenBucket:
+    """Token bucket that refills continuously at `refill_rate` tokens per second
+    up to `capacity` tokens.
+
+    Reservations debit the bucket immediately and may drive the balance negative.
+    The caller is told how long to wait until the balance it drew on has refilled,
+    so concurrent callers are served in the order they reserve without polling.
+    """
+
+    def __init__(self, capacity: float, refill_rate: float) -> None:
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
+        self.last_refill = now
+
+    def reserve(self, amount: float) -> float:
+        "Debit `amount` tokens and return the number of seconds to wait before using them."
+        self._refill()
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.refill_rate
+
+    def credit(self, amount: float) -> None:
+        "Return `amount` tokens to the bucket (or debit if negative)."
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """Dual token-bucket limiter metering both requests per minute (RPM) and
+    tokens per minute (TPM).
+
+    Each bucket holds `burst_seconds` worth of quota so that sustained throughput
+    approaches the per-minute ceiling without front-loading a full minute of requests.
+    Either limit may be `None` to leave that dimension unmetered.
+
+    Example Usage:
+    ```python
+    limiter = RateLimiter(requests_per_minute=500, tokens_per_minute=90_000)
+    await limiter.async_acquire(num_tokens=1200)
+    ```
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        burst_seconds: float = 6.0,
+    ) -> None:
+        self._lock = threading.Lock()
+        self.burst_seconds = burst_seconds
+        self.request_bucket: TokenBucket | None = None
+        self.token_bucket: TokenBucket | None = None
+        self.configure(requests_per_minute, tokens_per_minute)
+
+    def _make_bucket(self, per_minute: float | None) -> TokenBucket | None:
+        if per_minute is None:
+            return None
+        rate = per_minute / 60.0
+        # Capacity must fit at least a single request
+        return TokenBucket(capacity=max(1.0, rate * self.burst_seconds), refill_rate=rate)
+
+    def configure(
+        self, requests_per_minute: float | None = None, tokens_per_minute: float | None = None
+    ) -> None:
+        "Update limits in place so that every holder of this limiter sees the new quota."
+        with self._lock:
+            self.requests_per_minute = requests_per_minute
+            self.tokens_per_minute = tokens_per_minute
+            self.request_bucket = self._make_bucket(requests_per_minute)
+            self.token_bucket = self._make_bucket(tokens_per_minute)
+
+    def reserve(self, num_tokens: int = 0) -> float:
+        """Reserve one request and `num_tokens` tokens.
+
+        Returns:
+            Number of seconds the caller must wait before dispatching the request.
+        """
+        with self._lock:
+            wait = 0.0
+            if self.request_bucket is not None:
+                wait = max(wait, self.request_bucket.reserve(1))
+            if self.token_bucket is not None:
+                wait = max(wait, self.token_bucket.reserve(num_tokens))
+            return wait
+
+    def acquire(self, num_tokens: int = 0) -> None:
+        "Block current thread until request may be dispatched."
+        wait = self.reserve(num_tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def async_acquire(self, num_tokens: int = 0) -> None:
+        "Non-blocking version of `acquire` for use on an asyncio event loop."
+        wait = self.reserve(num_tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: int | None) -> None:
+        """Correct the token bucket once the true usage of a request is known.
+        Over-estimates are refunded and under-estimates are charged."""
+        if actual_tokens is None:
+            return
+        with self._lock:
+            if self.token_bucket is not None:
+                self.token_bucket.credit(estimated_tokens - actual_tokens)
+
+
+def estimate_num_tokens(messages: list[dict[str, str]], max_tokens: int | None = None) -> int:
+    """Cheap estimate of prompt + completion tokens for a chat request.
+
+    Uses a characters-per-token heuristic for the prompt and `max_tokens` (or a default
+    completion size) for the completion.  The estimate is reconciled against the actual
+    usage reported by the API via `RateLimiter.reconcile`.
+    """
+    prompt_chars = sum(len(m.get("content") or "") for m in messages)
+    prompt_tokens = prompt_chars // CHARS_PER_TOKEN + TOKENS_PER_MESSAGE * len(messages)
+    completion_tokens = max_tokens if max_tokens is not None else DEFAULT_COMPLETION_TOKENS
+    return prompt_tokens + completion_tokens
+
+
+# Registry of limiters shared by all ChatModel instances that target the same model
+_rate_limiters: dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def configure_rate_limit(
+    model: str,
+    requests_per_minute: float | None = None,
+    tokens_per_minute: float | None = None,
+) -> RateLimiter:
+    """Set the RPM/TPM quota for `model`.  Creates the shared limiter if it does not
+    exist, otherwise updates the existing limiter in place."""
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(model)
+        if limiter is None:
+            limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+            _rate_limiters[model] = limiter
+        elif (limiter.requests_per_minute, limiter.tokens_per_minute) != (
+            requests_per_minute,
+            tokens_per_minute,
+        ):
+            limiter.configure(requests_per_minute, tokens_per_minute)
+        return limiter
+
+
+def get_rate_limiter(model: str) -> RateLimiter | None:
+    "Get the shared limiter for `model`, or `None` if no quota has been configured."
+    return _rate_limiters.get(model)
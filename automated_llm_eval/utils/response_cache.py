@@ -0,0 +1,162 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+# Request arguments that are always part of the key (as `null` when not set)
+CACHE_KEY_FIELDS = ("model", "temperature", "top_p", "max_tokens", "seed", "n")
+# Client-side options that do not change the response
+CLIENT_OPTIONS = ("timeout", "extra_headers")
+
+
+def request_key(messages: list[dict[str, str]], api_kwargs: dict[str, Any]) -> str:
+    """Content-addressed key for a ChatCompletion request: the messages and every argument
+    sent to the API (e.g. `stop`, `response_format`, `tools`), except `CLIENT_OPTIONS`."""
+    payload = (
+        {"messages": messages}
+        | {k: api_kwargs.get(k) for k in CACHE_KEY_FIELDS}
+        | {k: v for k, v in api_kwargs.items() if k not in CLIENT_OPTIONS}
+    )
+    serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Persistent SQLite-backed cache of serialized API responses.
+
+    Entries older than `max_age_seconds` are treated as misses and purged.  When the
+    total size of cached values exceeds `max_size_bytes`, least recently used entries are
+    evicted.  In `read_only` mode (replay), the cache is never written to, which allows
+    reproducing old experiments offline from a previously recorded cache file.
+
+    Hit/miss statistics for the lifetime of this object are available at `stats`.
+
+    Example Usage:
+    ```python
+    cache = ResponseCache("cache/responses.sqlite", max_age_seconds=7 * 24 * 3600)
+    model = ChatModel(model="gpt-3.5-turbo-1106", seed=42, temperature=0.1, cache=cache)
+    ...
+    print(cache.stats)
+    ```
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_size_bytes: int | None = 1024**3,
+        max_age_seconds: float | None = None,
+        read_only: bool = False,
+        evict_every: int = 100,
+    ) -> None:
+        self.path = Path(path)
+        self.max_size_bytes = max_size_bytes
+        self.max_age_seconds = max_age_seconds
+        self.read_only = read_only
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if read_only:
+            self._conn = sqlite3.connect(
+                f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+            )
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)"
+            )
+            self._conn.commit()
+            self.evict()
+
+    def _is_expired(self, created: float, now: float) -> bool:
+        return self.max_age_seconds is not None and now - created > self.max_age_seconds
+
+    def get(self, key: str) -> str | None:
+        "Get cached value for `key`, or `None` on a miss."
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._is_expired(row[1], now):
+                self.misses += 1
+                return None
+            self.hits += 1
+            if not self.read_only:
+                self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        "Store `value` under `key`.  No-op in `read_only` mode."
+        if self.read_only:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            self._conn.commit()
+            self.writes += 1
+        if self.writes % self.evict_every == 0:
+            self.evict()
+
+    def evict(self) -> None:
+        "Purge expired entries, then least recently used entries until under the size limit."
+        if self.read_only:
+            return
+        with self._lock:
+            evicted = 0
+            if self.max_age_seconds is not None:
+                cursor = self._conn.execute(
+                    "DELETE FROM responses WHERE created < ?",
+                    (time.time() - self.max_age_seconds,),
+                )
+                evicted += cursor.rowcount
+            if self.max_size_bytes is not None:
+                (total_size,) = self._conn.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+                if total_size > self.max_size_bytes:
+                    excess = total_size - self.max_size_bytes
+                    keys = []
+                    for key, size in self._conn.execute(
+                        "SELECT key, size FROM responses ORDER BY accessed ASC"
+                    ):
+                        keys += [(key,)]
+                        excess -= size
+                        if excess <= 0:
+                            break
+                    self._conn.executemany("DELETE FROM responses WHERE key = ?", keys)
+                    evicted += len(keys)
+            self._conn.commit()
+            self.evictions += evicted
+
+    @property
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,203 @@
+import email.utils
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, NamedTuple
+
+# HTTP status codes that indicate a transient failure worth retrying
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+# Error codes returned by the API for requests that will never succeed as-is
+NON_RETRYABLE_ERROR_CODES = {"content_filter", "context_length_exceeded", "invalid_api_key"}
+
+
+class RetryAttempt(NamedTuple):
+    "Report of a single attempt passed to the `on_attempt` hook."
+    # 1-based attempt number
+    attempt: int
+    # One of "success", "rejected" (failed validation) or "error"
+    outcome: str
+    exception: BaseException | None
+    # Seconds until next attempt, or `None` if no further attempt will be made
+    delay: float | None
+    # Seconds since the first attempt started
+    elapsed: float
+
+
+def is_retryable_error(exception: BaseException) -> bool:
+    """Classify an exception as retryable (429, 5xx, timeouts, connection errors)
+    or non-retryable (other 4xx such as 400 bad request, or content-filter errors)."""
+    if getattr(exception, "code", None) in NON_RETRYABLE_ERROR_CODES:
+        return False
+    status_code = getattr(exception, "status_code", None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES or status_code >= 500
+    # Timeouts, dropped connections and malformed responses are treated as transient
+    return True
+
+
+def retry_after_seconds(exception: BaseException) -> float | None:
+    "Parse `Retry-After` (or `retry-after-ms`) header from an API error response."
+    response = getattr(exception, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if retry_after is None:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        retry_date = email.utils.parsedate_to_datetime(retry_after)
+        if retry_date is None:
+            return None
+        return max(0.0, retry_date.timestamp() - time.time())
+
+
+class RetryBudget:
+    """Limit on retries shared across the requests of every `RetryPolicy` it is set on.
+
+    Every new request deposits `ratio` tokens and the budget refills at
+    `refill_per_second`; every retry of a failed call withdraws one token.  When the budget
+    is empty, failed requests give up instead of retrying, so a widespread outage cannot
+    turn into a retry storm.  Size it against the request rate of the callers that share
+    it: a budget that is too small makes every caller give up at once under sustained 429s.
+    """
+
+    def __init__(
+        self, max_tokens: float = 50.0, ratio: float = 0.2, refill_per_second: float = 1.0
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.ratio = ratio
+        self.refill_per_second = refill_per_second
+        self.tokens = max_tokens
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.max_tokens, self.tokens + (now - self._last_refill) * self.refill_per_second
+        )
+        self._last_refill = now
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        "Take one retry token.  Returns `False` if the budget is exhausted."
+        with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+@dataclass(kw_only=True)
+class RetryPolicy:
+    """Full-jitter exponential backoff policy.
+
+    The delay before retry `k` is drawn uniformly from `[0, min(max_delay, base_delay * 2**k)]`.
+    A `Retry-After` header on the error takes precedence over the computed delay.
+    No retry is scheduled if it would start after `deadline` seconds from the first attempt.
+    Retries of failed calls (but not of responses rejected by validation) are also limited
+    by `budget`, if set.
+    """
+
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    deadline: float | None = 300.0
+    budget: RetryBudget | None = None
+    on_attempt: Callable[[RetryAttempt], None] | None = None
+
+    def backoff(self, retry_number: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**retry_number))
+
+
+class RetryState:
+    """Tracks the attempts of one request under a `RetryPolicy`.
+
+    This holds all retry decisions so that the sync and async call paths share one
+    engine and differ only in how they sleep.
+
+    Example Usage:
+    ```python
+    state = RetryState(policy, max_retries=5)
+    while True:
+        try:
+            result = make_request()
+            state.record("success")
+            return result
+        except Exception as e:
+            delay = state.record("error", e)
+        if delay is None:
+            return None
+        time.sleep(delay)
+    ```
+    """
+
+    def __init__(self, policy: RetryPolicy, max_retries: int) -> None:
+        self.policy = policy
+        self.max_retries = max_retries
+        self.attempt = 0
+        self.start_time = time.monotonic()
+        if policy.budget is not None:
+            policy.budget.deposit()
+
+    @property
+    def retries_left(self) -> int:
+        return max(0, self.max_retries - self.attempt + 1)
+
+    def record(self, outcome: str, exception: BaseException | None = None) -> float | None:
+        """Record the outcome of an attempt.
+
+        Args:
+            outcome (str): "success", "rejected" (response failed validation) or "error".
+            exception (BaseException | None): exception raised by an "error" attempt.
+
+        Returns:
+            Seconds to wait before the next attempt, or `None` if the request should not
+            be attempted again.
+        """
+        self.attempt += 1
+        delay = self._next_delay(outcome, exception)
+        if self.policy.on_attempt is not None:
+            self.policy.on_attempt(
+                RetryAttempt(
+                    attempt=self.attempt,
+                    outcome=outcome,
+                    exception=exception,
+                    delay=delay,
+                    elapsed=time.monotonic() - self.start_time,
+                )
+            )
+        return delay
+
+    def _next_delay(self, outcome: str, exception: BaseException | None) -> float | None:
+        if outcome == "success" or self.attempt > self.max_retries:
+            return None
+        if exception is not None and not is_retryable_error(exception):
+            return None
+        if outcome == "rejected":
+            # Response was received but rejected by validation; endpoint is healthy, so the
+            # retry is not charged to the budget meant for transport errors and 429s
+            delay = 0.0
+        else:
+            retry_after = retry_after_seconds(exception) if exception is not None else None
+            delay = retry_after if retry_after is not None else self.policy.backoff(self.attempt)
+        elapsed = time.monotonic() - self.start_time
+        if self.policy.deadline is not None and elapsed + delay > self.policy.deadline:
+            return None
+        if outcome == "error" and self.policy.budget is not None:
+            if not self.policy.budget.withdraw():
+                return None
+        return delay
@@ -0,0 +1,44 @@
+import threading
+from typing import Any
+
+
+class TokenUsage:
+    """Thread-safe running totals of API requests and token usage.
+
+    Example Usage:
+    ```python
+    usage = TokenUsage()
+    model = ChatModel(model="gpt-4", usage=usage)
+    ...
+    print(usage.as_dict())
+    ```
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_tokens = 0
+
+    def record(self, usage: Any) -> None:
+        "Add one request and its `usage` (the `usage` field of a ChatCompletion, or `None`)."
+        with self._lock:
+            self.requests += 1
+            if usage is None:
+                return
+            self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+            self.total_tokens += getattr(usage, "total_tokens", 0) or 0
+
+    def as_dict(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": self.total_tokens,
+            }
+
+    def __repr__(self) -> str:
+        return f"TokenUsage({self.as_dict()})"
@@ -172,7 +172,6 @@ def create_plots(engine_options, judge_options):
         for engine_judge in judge_options:
             df = analysis(engine, engine_judge, engine+ ' + ' +engine_judge)
             df.columns= df.columns.get_level_values(1)
-            make_spider_plot(df, engine, engine_judge)
             iteration_number.append(df.at['Iterations', 'Mean'])
             number_answered.append(df.at['Number Answered', 'Mean'])
             error_answered.append(np.std(df.at['Number Answered', 'Samples']))
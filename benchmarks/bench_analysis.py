@@ -0,0 +1,121 @@
+"""Benchmark of `model_analysis` on synthetic experiment runs.
+
+Generates `--num-runs` runs in the `model_performance` CSV layout, with a mix of questions
+answered on the first iteration and questions refined over several iterations, and times
+the vectorized `analysis_from_runs` at each `--rows` size (rows per run).  The previous
+row-by-row implementation, kept here as a reference, is timed up to `--legacy-max-rows`
+(it is quadratic in the number of rows), and both summary tables are checked to be equal.
+
+Usage:
+    python benchmarks/bench_analysis.py
+    python benchmarks/bench_analysis.py --rows 1000 10000 100000 --legacy-max-rows 5000
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+from automated_llm_eval.model_analysis import analysis_from_runs
+
+AGENT_COLUMNS = ["SafetyGPT", "EthicsGPT", "ClinicianGPT"]
+
+
+def make_run(num_rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    "One synthetic run, as read back from a `model_performance` CSV."
+    iterations = rng.integers(1, 6, size=num_rows)
+    questions = np.repeat(np.arange(num_rows), iterations)[:num_rows]
+    iteration_numbers = pd.Series(questions).groupby(questions).cumcount().to_numpy()
+    run = {
+        "Unnamed: 0": np.arange(num_rows),
+        "Iteration #": iteration_numbers,
+        "Question": [f"Question {q}?" for q in questions],
+        "Model Response": "response",
+    }
+    for agent in AGENT_COLUMNS:
+        run[f"{agent} Response"] = "rationale"
+        # Scores improve over iterations, so some questions end up answered
+        scores = rng.integers(4, 10, size=num_rows) + iteration_numbers
+        run[f"{agent} Score"] = np.minimum(scores, 10)
+    return pd.DataFrame(run)
+
+
+def legacy_analysis(model_runs_list, model_name="Model"):
+    "Previous row-by-row implementation of `analysis`, for reference."
+    model_iterations = [len(list(run["Iteration #"])) for run in model_runs_list]
+    agents = ["SafetyGPT Score", "EthicsGPT Score", "ClinicianGPT Score"]
+    agent_model_avg_scores = {}
+    for agent in agents:
+        model_avg_scores = [round(statistics.mean(list(run[agent])), 3) for run in model_runs_list]
+        agent_model_avg_scores[agent] = model_avg_scores
+    numb_answered = []
+    for run in model_runs_list:
+        run_dup = run.copy()
+        run_dup.loc[len(run_dup.index)] = [0] * len(run_dup.columns)
+        questions = list(run_dup["Question"])
+        answered = 0
+        for i in range(len(run)):
+            scores = [list(run_dup[agent])[i] for agent in agents]
+            if questions[i] != questions[i + 1] and all(score >= 8 for score in scores):
+                answered += 1
+        numb_answered.append(answered)
+    samples = [model_iterations, *agent_model_avg_scores.values(), numb_answered]
+    analysis_results = pd.DataFrame(
+        {
+            "Mean": [round(statistics.mean(sample), 3) for sample in samples],
+            "StDev": [round(statistics.stdev(sample), 3) for sample in samples],
+            "Samples": samples,
+        }
+    )
+    analysis_results.columns = [[model_name] * 3, ["Mean", "StDev", "Samples"]]
+    analysis_results.index = [
+        "Iterations",
+        "Avg Safety Score",
+        "Avg Ethics Score",
+        "Avg Clinician Score",
+        "Number Answered",
+    ]
+    return analysis_results
+
+
+def time_call(function, *args, repeat: int = 1) -> tuple[float, object]:
+    "Median seconds of `repeat` calls, and the result of the last call."
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", nargs="+", type=int, default=[1_000, 10_000, 100_000])
+    parser.add_argument("--num-runs", type=int, default=3)
+    parser.add_argument("--legacy-max-rows", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    table = Table(title=f"analysis() on {args.num_runs} synthetic runs")
+    for column in ["rows per run", "vectorized (s)", "legacy (s)", "speedup", "same table"]:
+        table.add_column(column)
+    for num_rows in args.rows:
+        runs = [make_run(num_rows, rng) for _ in range(args.num_runs)]
+        seconds, result = time_call(analysis_from_runs, runs, repeat=args.repeat)
+        legacy_seconds, speedup, same = "-", "-", "-"
+        if num_rows <= args.legacy_max_rows:
+            legacy_time, legacy_result = time_call(legacy_analysis, runs)
+            legacy_seconds = f"{legacy_time:.3f}"
+            speedup = f"{legacy_time / seconds:.0f}x"
+            same = str(result.equals(legacy_result))
+        table.add_row(f"{num_rows:,}", f"{seconds:.3f}", legacy_seconds, speedup, same)
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
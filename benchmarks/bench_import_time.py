@@ -0,0 +1,94 @@
+"""Import-time benchmark for the package modules and the CLI entry point.
+
+Each module is imported in a fresh interpreter several times and the median wall time
+is reported, along with the slowest imported dependencies from `python -X importtime`.
+Use `--budget` to fail (exit code 1) when any module exceeds a time budget, so that
+regressions in startup cost can be tracked.
+
+Usage:
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --repeat 10 --budget 1.0
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+MODULES = [
+    "main",
+    "automated_llm_eval.chat_model",
+    "automated_llm_eval.policy_tuning",
+    "automated_llm_eval.model_performance",
+    "automated_llm_eval.model_analysis",
+    "automated_llm_eval.test",
+    "automated_llm_eval.visualize",
+]
+
+
+def time_import(module: str, repeat: int) -> float:
+    "Median seconds to start an interpreter and import `module`, minus interpreter startup."
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def slowest_dependencies(module: str, top: int) -> list[tuple[str, float]]:
+    "Top-level packages with the largest cumulative import time according to `-X importtime`."
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    own_packages = {module.split(".")[0], "automated_llm_eval"}
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.removeprefix("import time:").split("|")
+        name = name.strip()
+        # Only report third-party/stdlib package roots, e.g. `openai` but not `openai._client`
+        if "." in name or name in own_packages:
+            continue
+        cumulative[name] = max(cumulative.get(name, 0.0), int(cumulative_us) / 1e6)
+    ranked = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)
+    return ranked[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=3)
+    parser.add_argument("--budget", type=float, help="Maximum seconds allowed per module.")
+    args = parser.parse_args()
+
+    baseline = time_import("sys", args.repeat)
+    table = Table(title=f"Import Time (interpreter startup {baseline:.3f}s subtracted)")
+    table.add_column("module")
+    table.add_column("import time (s)")
+    table.add_column("slowest dependencies")
+    over_budget = []
+    for module in args.modules:
+        seconds = max(0.0, time_import(module, args.repeat) - baseline)
+        dependencies = ", ".join(
+            f"{name} {t:.2f}s" for name, t in slowest_dependencies(module, args.top)
+        )
+        table.add_row(module, f"{seconds:.3f}", dependencies)
+        if args.budget is not None and seconds > args.budget:
+            over_budget += [module]
+    Console().print(table)
+    if over_budget:
+        print(f"Over budget of {args.budget}s: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Throughput benchmark for the chat completion call paths against the local mock server.
+
+Drives `ChatModel.chat_completions`, `ChatModel.async_chat_completions` and the legacy
+`create_chat_completion.create_chat_completion` across concurrency levels and reports
+requests/sec, p50/p95/p99 latency, retries and peak Python memory.  No real API calls
+are made.
+
+Usage:
+    python benchmarks/bench_throughput.py --num-requests 200 --concurrency 1 5 10 25
+    python benchmarks/bench_throughput.py --error-rate-429 0.05 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+from rich.console import Console
+from rich.table import Table
+
+from automated_llm_eval.chat_model import ChatModel
+from automated_llm_eval.create_chat_completion import create_chat_completion
+from automated_llm_eval.mock_server import MockOpenAIServer, MockServerConfig
+from automated_llm_eval.utils import RetryPolicy
+
+
+def make_messages(num_requests: int) -> list[list[dict[str, str]]]:
+    "Distinct messages so that no request is served by coalescing."
+    return [
+        [
+            {"role": "system", "content": "You are an expert AI agent."},
+            {"role": "user", "content": f"Score the following statement #{i}."},
+        ]
+        for i in range(num_requests)
+    ]
+
+
+def make_chat_model(server: MockOpenAIServer, latencies: list[float]) -> ChatModel:
+    def record_latency(attempt) -> None:
+        if attempt.outcome == "success":
+            latencies.append(attempt.elapsed)
+
+    return ChatModel(
+        sync_client=openai.OpenAI(api_key="mock", base_url=server.base_url, max_retries=0),
+        async_client=openai.AsyncOpenAI(api_key="mock", base_url=server.base_url, max_retries=0),
+        model="mock-model",
+        retry_policy=RetryPolicy(base_delay=0.1, on_attempt=record_latency),
+    )
+
+
+def run_chat_completions(server, messages_list, concurrency, latencies) -> None:
+    # Synchronous path has no concurrency; it is benchmarked once at concurrency 1
+    model = make_chat_model(server, latencies)
+    model.chat_completions(messages_list, output_format="simple")
+
+
+def run_async_chat_completions(server, messages_list, concurrency, latencies) -> None:
+    model = make_chat_model(server, latencies)
+    asyncio.run(
+        model.async_chat_completions(
+            messages_list, num_concurrent=concurrency, output_format="simple"
+        )
+    )
+
+
+def run_legacy_create_chat_completion(server, messages_list, concurrency, latencies) -> None:
+    def call(messages) -> None:
+        start = time.monotonic()
+        create_chat_completion(
+            "mock-model",
+            messages[0]["content"],
+            messages[1]["content"],
+            "mock",
+            api_base=server.base_url,
+        )
+        latencies.append(time.monotonic() - start)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, messages_list))
+
+
+BENCHMARKS = {
+    "ChatModel.chat_completions": run_chat_completions,
+    "ChatModel.async_chat_completions": run_async_chat_completions,
+    "create_chat_completion": run_legacy_create_chat_completion,
+}
+
+
+def run_benchmark(name, server, num_requests, concurrency) -> dict:
+    messages_list = make_messages(num_requests)
+    latencies: list[float] = []
+    requests_before = server.stats["requests"]
+    tracemalloc.start()
+    start = time.monotonic()
+    BENCHMARKS[name](server, messages_list, concurrency, latencies)
+    wall_time = time.monotonic() - start
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    num_requests_served = server.stats["requests"] - requests_before
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    return {
+        "benchmark": name,
+        "concurrency": concurrency,
+        "requests": num_requests,
+        "succeeded": len(latencies),
+        "wall_time_s": wall_time,
+        "requests_per_s": len(latencies) / wall_time,
+        "p50_latency_s": quantiles[49],
+        "p95_latency_s": quantiles[94],
+        "p99_latency_s": quantiles[98],
+        "retries": max(0, num_requests_served - num_requests),
+        "peak_memory_mb": peak_memory / 1024**2,
+    }
+
+
+def print_results(results: list[dict]) -> None:
+    table = Table(title="Chat Completion Throughput (mock server)")
+    for column in (
+        "benchmark",
+        "concurrency",
+        "succeeded",
+        "req/s",
+        "p50 (s)",
+        "p95 (s)",
+        "p99 (s)",
+        "retries",
+        "peak mem (MB)",
+    ):
+        table.add_column(column)
+    for r in results:
+        table.add_row(
+            r["benchmark"],
+            str(r["concurrency"]),
+            f"{r['succeeded']}/{r['requests']}",
+            f"{r['requests_per_s']:.1f}",
+            f"{r['p50_latency_s']:.3f}",
+            f"{r['p95_latency_s']:.3f}",
+            f"{r['p99_latency_s']:.3f}",
+            str(r["retries"]),
+            f"{r['peak_memory_mb']:.1f}",
+        )
+    Console().print(table)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--num-requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    parser.add_argument("--benchmarks", nargs="+", default=list(BENCHMARKS), choices=BENCHMARKS)
+    parser.add_argument("--latency-mean", type=float, default=0.1)
+    parser.add_argument("--latency-jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate-429", type=float, default=0.0)
+    parser.add_argument("--error-rate-500", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    parser.add_argument("--output", help="Write results as JSON to this path.")
+    args = parser.parse_args()
+
+    config = MockServerConfig(
+        latency_mean=args.latency_mean,
+        latency_jitter=args.latency_jitter,
+        rate_limit_error_rate=args.error_rate_429,
+        server_error_rate=args.error_rate_500,
+        retry_after=args.retry_after,
+    )
+    results = []
+    # Failed attempts are reported through the results table instead
+    warnings.simplefilter("ignore")
+    with MockOpenAIServer(config) as server:
+        for name in args.benchmarks:
+            levels = [1] if name == "ChatModel.chat_completions" else args.concurrency
+            for concurrency in levels:
+                results += [run_benchmark(name, server, args.num_requests, concurrency)]
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
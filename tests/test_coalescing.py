@@ -0,0 +1,167 @@
+import asyncio
+import warnings
+
+import pytest
+
+from automated_llm_eval.chat_model import ChatModel
+from automated_llm_eval.mock_server import MockOpenAIServer, MockServerConfig
+
+MESSAGES = [
+    {"role": "system", "content": "You are a helpful assistant."},
+    {"role": "user", "content": "Rate this answer."},
+]
+
+
+class CountingSemaphore(asyncio.Semaphore):
+    "Semaphore that counts how many times a slot was taken."
+
+    def __init__(self, value: int = 1) -> None:
+        super().__init__(value)
+        self.acquired = 0
+
+    async def acquire(self) -> bool:
+        result = await super().acquire()
+        self.acquired += 1
+        return result
+
+
+@pytest.fixture(scope="module")
+def server():
+    config = MockServerConfig(latency_distribution="constant", latency_mean=0.3)
+    with MockOpenAIServer(config) as server:
+        yield server
+
+
+def make_model(server, **kwargs) -> ChatModel:
+    return ChatModel(api_key="mock", base_url=server.base_url, seed=1, temperature=0.0, **kwargs)
+
+
+def num_requests(server, function) -> tuple[int, object]:
+    before = server.stats["requests"]
+    result = asyncio.run(function())
+    return server.stats["requests"] - before, result
+
+
+def test_identical_inflight_requests_share_one_call(server):
+    model = make_model(server)
+
+    async def run():
+        return await asyncio.gather(
+            *[model.async_chat_completion(MESSAGES, output_format="simple") for _ in range(8)]
+        )
+
+    requests, responses = num_requests(server, run)
+    assert requests == 1
+    assert len(set(responses)) == 1 and responses[0]
+
+
+def test_requests_differing_in_any_api_argument_are_not_shared(server):
+    model = make_model(server)
+
+    async def run():
+        return await asyncio.gather(
+            model.async_chat_completion(MESSAGES, output_format="simple"),
+            model.async_chat_completion(MESSAGES, output_format="simple", stop=["\n"]),
+            model.async_chat_completion(MESSAGES, output_format="simple", presence_penalty=0.5),
+        )
+
+    requests, _ = num_requests(server, run)
+    assert requests == 3
+
+
+def test_random_sampling_is_not_coalesced(server):
+    model = make_model(server, coalesce_max_temperature=0.2)
+
+    async def run():
+        return await asyncio.gather(
+            *[
+                model.async_chat_completion(MESSAGES, output_format="simple", temperature=0.9)
+                for _ in range(3)
+            ]
+        )
+
+    requests, _ = num_requests(server, run)
+    assert requests == 3
+
+
+def test_waiter_reissues_request_when_leader_is_cancelled(server):
+    model = make_model(server)
+    semaphore = CountingSemaphore(1)
+
+    async def run():
+        leader = asyncio.create_task(
+            model.limited_chat_completion(semaphore, MESSAGES, output_format="simple")
+        )
+        await asyncio.sleep(0.05)
+        waiter = asyncio.create_task(
+            model.limited_chat_completion(semaphore, MESSAGES, output_format="simple")
+        )
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    requests, response = num_requests(server, run)
+    assert response
+    assert requests == 2
+    # The re-issued call took a slot of its own
+    assert semaphore.acquired == 2
+
+
+def test_cancelled_waiter_does_not_cancel_leader(server):
+    model = make_model(server)
+
+    async def run():
+        leader = asyncio.create_task(model.async_chat_completion(MESSAGES, output_format="simple"))
+        await asyncio.sleep(0.05)
+        waiter = asyncio.create_task(model.async_chat_completion(MESSAGES, output_format="simple"))
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return await leader
+
+    requests, response = num_requests(server, run)
+    assert response
+    assert requests == 1
+
+
+def test_waiters_retry_when_leader_fails(server):
+    model = make_model(server)
+    calls = []
+    client = model.get_async_client
+
+    def failing_once_client():
+        real = client()
+
+        class Completions:
+            async def create(self, **kwargs):
+                calls.append(kwargs)
+                if len(calls) == 1:
+                    await asyncio.sleep(0.1)
+                    raise RuntimeError("connection reset")
+                return await real.chat.completions.create(**kwargs)
+
+        class Chat:
+            completions = Completions()
+
+        class Client:
+            chat = Chat()
+
+        return Client()
+
+    model.get_async_client = failing_once_client
+
+    async def run():
+        return await asyncio.gather(
+            *[model.async_chat_completion(MESSAGES, output_format="simple") for _ in range(4)]
+        )
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        _, responses = num_requests(server, run)
+    assert all(responses)
+    # One failed call shared by all four, then at most one retry each (retries are jittered,
+    # so they are only shared if they overlap)
+    assert 2 <= len(calls) <= 5
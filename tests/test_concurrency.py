@@ -0,0 +1,146 @@
+import asyncio
+
+from automated_llm_eval.utils.concurrency import AdaptiveConcurrencyLimiter, is_congestion_error
+
+
+class APIError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def test_is_congestion_error():
+    assert is_congestion_error(APIError(429))
+    assert is_congestion_error(APIError(503))
+    assert is_congestion_error(asyncio.TimeoutError())
+    assert not is_congestion_error(APIError(400))
+    assert not is_congestion_error(ValueError("bad response"))
+
+
+def test_additive_increase_once_per_window():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=4)
+    limiter.record_success(0.1)
+    assert limiter.limit == 2
+    limiter.record_success(0.1)
+    assert limiter.limit == 3
+    for _ in range(3):
+        limiter.record_success(0.1)
+    assert limiter.limit == 4
+    # Capped at max_limit
+    for _ in range(10):
+        limiter.record_success(0.1)
+    assert limiter.limit == 4
+    assert [change.limit for change in limiter.history] == [2, 3, 4]
+
+
+def test_multiplicative_decrease_on_congestion_only():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, min_limit=2)
+    limiter.record_failure(APIError(400), latency=0.0)
+    assert limiter.limit == 16
+    limiter.record_failure(APIError(429), latency=0.0)
+    assert limiter.limit == 8
+    assert limiter.history[-1].reason == "APIError"
+    # Requests dispatched before the decrease do not cut the window again
+    limiter.record_failure(APIError(429), latency=60.0)
+    assert limiter.limit == 8
+    limiter.record_failure(APIError(500), latency=0.0)
+    limiter.record_failure(APIError(500), latency=0.0)
+    limiter.record_failure(APIError(500), latency=0.0)
+    assert limiter.limit == 2
+
+
+def test_decrease_on_latency_spike():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=50, max_limit=50, latency_window=20)
+    for _ in range(20):
+        limiter.record_success(0.1)
+    assert limiter.limit == 50
+    for _ in range(20):
+        limiter.record_success(1.0)
+    assert limiter.limit == 25
+    assert limiter.history[-1].reason.startswith("p95 latency spike")
+
+
+async def _run_workers(limiter, num_workers, work):
+    active = 0
+    max_active = 0
+
+    async def worker(k):
+        nonlocal active, max_active
+        async with limiter:
+            active += 1
+            max_active = max(max_active, active)
+            await work(k)
+            active -= 1
+
+    await asyncio.gather(*[worker(k) for k in range(num_workers)])
+    return max_active
+
+
+def test_window_bounds_concurrency_without_losing_permits():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=3, max_limit=3)
+
+    async def work(k):
+        await asyncio.sleep(0.01)
+
+    max_active = asyncio.run(_run_workers(limiter, 20, work))
+    assert max_active == 3
+    assert limiter.in_flight == 0
+    assert not limiter._waiters
+
+
+def test_window_changes_while_requests_wait():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, min_limit=1, max_limit=8)
+
+    async def work(k):
+        await asyncio.sleep(0.01)
+        if k == 2:
+            limiter.record_failure(APIError(429), latency=0.0)
+        else:
+            limiter.record_success(0.01)
+
+    async def run():
+        return await asyncio.wait_for(_run_workers(limiter, 40, work), timeout=5)
+
+    max_active = asyncio.run(run())
+    assert max_active <= 8
+    assert limiter.in_flight == 0
+    assert not limiter._waiters
+    limits = [change.limit for change in limiter.history]
+    assert min(limits) == 2 and limits[-1] > 2
+
+
+def test_cancelled_waiter_does_not_take_a_slot():
+    async def run():
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.wait_for(limiter.acquire(), timeout=1)
+        return limiter.in_flight
+
+    assert asyncio.run(run()) == 1
+
+
+def test_waiter_cancelled_after_wake_up_hands_slot_on():
+    "Regression: a waiter woken and then cancelled before resuming swallowed the wake-up."
+
+    async def run():
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+        await limiter.acquire()
+
+        async def request():
+            async with limiter:
+                return "done"
+
+        first = asyncio.create_task(request())
+        second = asyncio.create_task(request())
+        await asyncio.sleep(0)
+        limiter.release()  # wakes `first`
+        first.cancel()  # cancelled before it resumes
+        result = await asyncio.wait_for(second, timeout=1)
+        return result, limiter.in_flight
+
+    assert asyncio.run(run()) == ("done", 0)
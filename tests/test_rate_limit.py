@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+import pytest
+
+from automated_llm_eval.utils import rate_limit
+from automated_llm_eval.utils.rate_limit import (
+    RateLimiter,
+    TokenBucket,
+    configure_rate_limit,
+    estimate_num_tokens,
+    get_rate_limiter,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+def test_token_bucket_reserve_and_refill(clock):
+    bucket = TokenBucket(capacity=5, refill_rate=2)
+    assert [bucket.reserve(1) for _ in range(5)] == [0.0] * 5
+    # Reservations past the balance wait for the deficit to refill, in order
+    assert bucket.reserve(1) == pytest.approx(0.5)
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    clock.advance(1.0)
+    assert bucket.tokens == pytest.approx(-2)
+    assert bucket.reserve(0) == pytest.approx(0.0)
+    # Refill is capped at capacity
+    clock.advance(60)
+    assert bucket.reserve(0) == 0.0
+    assert bucket.tokens == pytest.approx(5)
+
+
+def test_requests_per_minute_pacing(clock):
+    # 60 RPM with a 6 second burst: 6 requests at once, then one per second
+    limiter = RateLimiter(requests_per_minute=60, burst_seconds=6)
+    waits = [limiter.reserve() for _ in range(9)]
+    assert waits[:6] == [0.0] * 6
+    assert waits[6:] == pytest.approx([1.0, 2.0, 3.0])
+    clock.advance(3.0)
+    assert limiter.reserve() == pytest.approx(1.0)
+
+
+def test_capacity_fits_one_request(clock):
+    limiter = RateLimiter(requests_per_minute=1, burst_seconds=1)
+    assert limiter.request_bucket.capacity == 1
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == pytest.approx(60.0)
+
+
+def test_tokens_per_minute_uses_largest_wait(clock):
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=6000, burst_seconds=6)
+    assert limiter.reserve(600) == 0.0
+    # Request quota is available, token quota is 200 short at 100 tokens/s
+    assert limiter.reserve(200) == pytest.approx(2.0)
+
+
+def test_reconcile_refunds_overestimates_and_charges_underestimates(clock):
+    limiter = RateLimiter(tokens_per_minute=6000, burst_seconds=6)
+    assert limiter.reserve(600) == 0.0
+    assert limiter.reserve(100) == pytest.approx(1.0)
+    # The first request used 100 tokens instead of the 600 estimated
+    limiter.reconcile(600, 100)
+    assert limiter.reserve(100) == 0.0
+    assert limiter.token_bucket.tokens == pytest.approx(300)
+    # The second request used 400 tokens instead of 100
+    limiter.reconcile(100, 400)
+    assert limiter.token_bucket.tokens == pytest.approx(0)
+    # Unknown usage leaves the estimate in place
+    limiter.reconcile(100, None)
+    assert limiter.token_bucket.tokens == pytest.approx(0)
+    # Refunds never overflow the bucket
+    clock.advance(60)
+    limiter.reconcile(1000, 0)
+    assert limiter.token_bucket.tokens == pytest.approx(600)
+
+
+def test_unmetered_limits(clock):
+    limiter = RateLimiter()
+    assert all(limiter.reserve(10_000) == 0.0 for _ in range(100))
+
+
+def test_configure_rate_limit_updates_shared_limiter_in_place():
+    model = "test-rate-limit-registry-model"
+    limiter = configure_rate_limit(model, requests_per_minute=60)
+    assert get_rate_limiter(model) is limiter
+    assert configure_rate_limit(model, requests_per_minute=60) is limiter
+    configure_rate_limit(model, requests_per_minute=120, tokens_per_minute=1000)
+    assert get_rate_limiter(model) is limiter
+    assert limiter.requests_per_minute == 120
+    assert limiter.token_bucket.refill_rate == pytest.approx(1000 / 60)
+    assert get_rate_limiter("test-rate-limit-unconfigured-model") is None
+
+
+def test_estimate_num_tokens():
+    messages = [{"role": "system", "content": "x" * 40}, {"role": "user", "content": "y" * 80}]
+    assert estimate_num_tokens(messages, max_tokens=100) == 40 // 4 + 80 // 4 + 2 * 4 + 100
+    assert estimate_num_tokens(messages) == 10 + 20 + 8 + rate_limit.DEFAULT_COMPLETION_TOKENS
+
+
+def test_async_acquire_paces_concurrent_callers():
+    # 600 RPM with a burst of one request: one request every 0.1 seconds
+    limiter = RateLimiter(requests_per_minute=600, burst_seconds=0.1)
+    dispatched = []
+
+    async def request():
+        await limiter.async_acquire()
+        dispatched.append(time.monotonic())
+
+    async def run():
+        await asyncio.gather(*[request() for _ in range(5)])
+
+    start = time.monotonic()
+    asyncio.run(run())
+    offsets = sorted(t - start for t in dispatched)
+    assert offsets[0] < 0.05
+    assert offsets[-1] == pytest.approx(0.4, abs=0.08)
+    gaps = [b - a for a, b in zip(offsets, offsets[1:])]
+    assert min(gaps) > 0.07
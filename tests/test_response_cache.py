@@ -0,0 +1,45 @@
+from automated_llm_eval.utils.response_cache import ResponseCache, request_key
+
+MESSAGES = [
+    {"role": "system", "content": "You are a helpful assistant."},
+    {"role": "user", "content": "Rate this answer."},
+]
+API_KWARGS = {
+    "model": "gpt-3.5-turbo-1106",
+    "temperature": 0.1,
+    "top_p": 0.5,
+    "max_tokens": 700,
+    "n": 1,
+    "seed": 42,
+}
+
+
+def test_request_key_includes_every_api_argument():
+    key = request_key(MESSAGES, API_KWARGS)
+    assert key == request_key(MESSAGES, dict(reversed(API_KWARGS.items())))
+    for extra in [
+        {"stop": ["\n"]},
+        {"response_format": {"type": "json_object"}},
+        {"presence_penalty": 0.5},
+        {"frequency_penalty": 0.5},
+        {"logit_bias": {"50256": -100}},
+        {"tools": [{"type": "function", "function": {"name": "score"}}]},
+    ]:
+        assert request_key(MESSAGES, API_KWARGS | extra) != key
+    assert request_key(MESSAGES, API_KWARGS | {"seed": 7}) != key
+    assert request_key(MESSAGES[1:], API_KWARGS) != key
+
+
+def test_request_key_ignores_client_options():
+    key = request_key(MESSAGES, API_KWARGS)
+    assert request_key(MESSAGES, API_KWARGS | {"timeout": 5.0}) == key
+    assert request_key(MESSAGES, API_KWARGS | {"extra_headers": {"X-Trace": "1"}}) == key
+
+
+def test_response_cache_separates_requests(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite")
+    cache.put(request_key(MESSAGES, API_KWARGS), "plain")
+    cache.put(request_key(MESSAGES, API_KWARGS | {"stop": ["."]}), "stopped")
+    assert cache.get(request_key(MESSAGES, API_KWARGS)) == "plain"
+    assert cache.get(request_key(MESSAGES, API_KWARGS | {"stop": ["."]})) == "stopped"
+    assert cache.get(request_key(MESSAGES, API_KWARGS | {"stop": [";"]})) is None
@@ -0,0 +1,55 @@
+from automated_llm_eval.result_sink import JSONLResultSink, truncate_partial_line
+
+
+def test_jsonl_resume(tmp_path):
+    path = tmp_path / "results.jsonl"
+    with JSONLResultSink(path) as sink:
+        sink.write("q1", {"score": 1})
+        sink.write("q2", {"score": 2})
+    with JSONLResultSink(path, resume=True) as sink:
+        assert sink.completed_keys() == {"q1", "q2"}
+        sink.write("q3", {"score": 3})
+        assert sink.read() == {"q1": {"score": 1}, "q2": {"score": 2}, "q3": {"score": 3}}
+
+
+def test_jsonl_no_resume_discards_results(tmp_path):
+    path = tmp_path / "results.jsonl"
+    with JSONLResultSink(path) as sink:
+        sink.write("q1", {"score": 1})
+    with JSONLResultSink(path, resume=False) as sink:
+        assert sink.read() == {}
+
+
+def test_jsonl_resume_after_torn_write(tmp_path):
+    path = tmp_path / "results.jsonl"
+    with JSONLResultSink(path) as sink:
+        sink.write("q1", {"score": 1})
+        sink.write("q2", {"score": 2})
+    # Crash in the middle of writing a record
+    with open(path, "a", encoding="utf-8") as file:
+        file.write('{"key": "q3", "val')
+
+    with JSONLResultSink(path, resume=True) as sink:
+        assert sink.completed_keys() == {"q1", "q2"}
+        sink.write("q3", {"score": 3})
+        sink.write("q4", {"score": 4})
+    results = JSONLResultSink(path, resume=True).read()
+    assert results == {
+        "q1": {"score": 1},
+        "q2": {"score": 2},
+        "q3": {"score": 3},
+        "q4": {"score": 4},
+    }
+
+
+def test_truncate_partial_line(tmp_path):
+    path = tmp_path / "lines.txt"
+    path.write_bytes(b"first\nsecond\nthi")
+    truncate_partial_line(path, chunk_size=4)
+    assert path.read_bytes() == b"first\nsecond\n"
+    truncate_partial_line(path)
+    assert path.read_bytes() == b"first\nsecond\n"
+
+    path.write_bytes(b"no newline at all")
+    truncate_partial_line(path)
+    assert path.read_bytes() == b""
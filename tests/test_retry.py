@@ -0,0 +1,143 @@
+import email.utils
+import random
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from automated_llm_eval.utils import retry
+from automated_llm_eval.utils.retry import (
+    RetryBudget,
+    RetryPolicy,
+    RetryState,
+    is_retryable_error,
+    retry_after_seconds,
+)
+
+
+class APIError(Exception):
+    def __init__(self, status_code: int | None = None, headers: dict | None = None, code=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.code = code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+def test_is_retryable_error():
+    assert is_retryable_error(APIError(429))
+    assert is_retryable_error(APIError(408))
+    assert is_retryable_error(APIError(502))
+    assert is_retryable_error(TimeoutError())
+    assert not is_retryable_error(APIError(400))
+    assert not is_retryable_error(APIError(401))
+    assert not is_retryable_error(APIError(400, code="context_length_exceeded"))
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds(APIError(429, {"retry-after": "2"})) == 2.0
+    assert retry_after_seconds(APIError(429, {"retry-after-ms": "1500"})) == 1.5
+    # Milliseconds take precedence over seconds
+    assert retry_after_seconds(APIError(429, {"retry-after": "9", "retry-after-ms": "20"})) == 0.02
+    http_date = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert retry_after_seconds(APIError(429, {"retry-after": http_date})) == pytest.approx(
+        30, abs=1.5
+    )
+    assert retry_after_seconds(APIError(429)) is None
+    assert retry_after_seconds(ValueError()) is None
+
+
+def test_full_jitter_backoff_bounds():
+    random.seed(0)
+    policy = RetryPolicy(base_delay=0.5, max_delay=4.0)
+    for retry_number in range(8):
+        cap = min(4.0, 0.5 * 2**retry_number)
+        delays = [policy.backoff(retry_number) for _ in range(500)]
+        assert all(0 <= delay <= cap for delay in delays)
+        # Full jitter: spread over the whole interval, not clustered at the cap
+        assert min(delays) < 0.1 * cap and max(delays) > 0.9 * cap
+
+
+def test_retry_after_overrides_backoff():
+    state = RetryState(RetryPolicy(base_delay=100.0, max_delay=100.0), max_retries=3)
+    assert state.record("error", APIError(429, {"retry-after": "0.25"})) == 0.25
+
+
+def test_max_retries_and_non_retryable_errors():
+    state = RetryState(RetryPolicy(base_delay=0.0), max_retries=2)
+    assert state.record("error", APIError(500)) == 0.0
+    assert state.record("error", APIError(500)) == 0.0
+    assert state.record("error", APIError(500)) is None
+    assert state.retries_left == 0
+
+    state = RetryState(RetryPolicy(), max_retries=5)
+    assert state.record("error", APIError(400)) is None
+    state = RetryState(RetryPolicy(), max_retries=5)
+    assert state.record("success") is None
+
+
+def test_deadline(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(retry.time, "monotonic", lambda: now[0])
+    state = RetryState(RetryPolicy(deadline=10.0), max_retries=10)
+    assert state.record("error", APIError(429, {"retry-after": "4"})) == 4.0
+    now[0] = 7.0
+    # Retrying after 4 more seconds would start past the deadline
+    assert state.record("error", APIError(429, {"retry-after": "4"})) is None
+
+
+def test_budget_refills_and_is_exhausted(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(retry.time, "monotonic", lambda: now[0])
+    budget = RetryBudget(max_tokens=3, ratio=0.5, refill_per_second=1.0)
+    assert [budget.withdraw() for _ in range(4)] == [True, True, True, False]
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw() and not budget.withdraw()
+    now[0] = 2.0
+    assert budget.withdraw() and budget.withdraw() and not budget.withdraw()
+    # Refills are capped
+    now[0] = 100.0
+    assert sum(budget.withdraw() for _ in range(10)) == 3
+
+
+def test_exhausted_budget_stops_retries(monkeypatch):
+    monkeypatch.setattr(retry.time, "monotonic", lambda: 0.0)
+    budget = RetryBudget(max_tokens=2, ratio=0.0, refill_per_second=0.0)
+    policy = RetryPolicy(base_delay=0.0, budget=budget)
+    first, second = RetryState(policy, max_retries=5), RetryState(policy, max_retries=5)
+    assert first.record("error", APIError(429)) == 0.0
+    assert second.record("error", APIError(429)) == 0.0
+    assert first.record("error", APIError(429)) is None
+    assert second.record("error", APIError(429)) is None
+
+
+def test_validation_rejections_are_not_charged_to_budget(monkeypatch):
+    monkeypatch.setattr(retry.time, "monotonic", lambda: 0.0)
+    budget = RetryBudget(max_tokens=1, ratio=0.0, refill_per_second=0.0)
+    state = RetryState(RetryPolicy(budget=budget), max_retries=10)
+    assert [state.record("rejected") for _ in range(5)] == [0.0] * 5
+    assert budget.tokens == 1
+    assert state.record("error", APIError(503)) is not None
+    assert budget.tokens == 0
+
+
+def test_policies_do_not_share_a_budget_by_default():
+    assert RetryPolicy().budget is None
+    state = RetryState(RetryPolicy(base_delay=0.0), max_retries=100)
+    assert all(state.record("error", APIError(429)) == 0.0 for _ in range(100))
+
+
+def test_on_attempt_hook():
+    attempts = []
+    policy = RetryPolicy(base_delay=0.0, on_attempt=attempts.append)
+    state = RetryState(policy, max_retries=3)
+    error = APIError(503)
+    state.record("error", error)
+    state.record("rejected")
+    state.record("success")
+    assert [(a.attempt, a.outcome, a.delay) for a in attempts] == [
+        (1, "error", 0.0),
+        (2, "rejected", 0.0),
+        (3, "success", None),
+    ]
+    assert attempts[0].exception is error
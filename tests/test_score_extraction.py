@@ -0,0 +1,86 @@
+import pytest
+
+from automated_llm_eval.score_extraction import (
+    AGENT_SCORE_RANGE,
+    COMPARE_SCORE_RANGE,
+    ScoreExtractor,
+    parse_bare_number,
+    parse_score_phrase,
+)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("-1", -1),
+        ("2", 2),
+        ("Score: -2.", -2),
+        ("−1", -1),
+        ("+1", 1),
+        ("3", None),
+        ("1.5", None),
+    ],
+)
+def test_parse_bare_number_compare(text, expected):
+    assert parse_bare_number(text, COMPARE_SCORE_RANGE) == expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("The agent gives a score -1.", -1),
+        ("Score -2 (the response misses the main point).", -2),
+        ("rating -1", -1),
+        ("Score: -1", -1),
+        ("Score: 2", 2),
+        ("Score - 1", 1),
+        ("Score - the summaries are equivalent, so 0.", None),
+        ("The score is −2.", -2),
+        ("Score: -1. I am confident the score is -1.", -1),
+        ("The score for summary B is -1.", -1),
+    ],
+)
+def test_parse_score_phrase_signed_compare(text, expected):
+    assert parse_score_phrase(text, COMPARE_SCORE_RANGE) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "The score is 7 or 8.",
+        "I would rate this 7-8.",
+        "The score should be 6 to 7, depending on the reader.",
+        "Score: 7. On reflection the score is 7 or 8.",
+        "The score is 7, not 8; the score is 8 for the other answer.",
+    ],
+)
+def test_parse_score_phrase_ambiguous(text):
+    assert parse_score_phrase(text, AGENT_SCORE_RANGE) is None
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("After reviewing the response, the score is 7.", 7),
+        ("Score: 9/10", 9),
+        ("I rate it 8 out of 10.", 8),
+        ("It needs a score of 8 or above to pass; the score is 6.", 6),
+        ("The score is 11.", None),
+    ],
+)
+def test_parse_score_phrase_agent(text, expected):
+    assert parse_score_phrase(text, AGENT_SCORE_RANGE) == expected
+
+
+def test_ambiguous_score_reaches_llm_fallback():
+    calls = []
+
+    def llm_fallback(text):
+        calls.append(text)
+        return "-1"
+
+    extractor = ScoreExtractor(COMPARE_SCORE_RANGE, llm_fallback=llm_fallback)
+    scores = extractor.extract_many(["Score: -2", "The score is -1 or 0."])
+    assert scores == [-2, -1]
+    assert calls == ["The score is -1 or 0."]
+    assert extractor.stats.counts["llm"] == 1